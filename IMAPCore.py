@@ -0,0 +1,4474 @@
+import numpy as np
+import os
+import getpass
+import email
+import email.utils
+import imaplib
+import pickle
+import re
+import sys
+import datetime
+import argparse
+import asyncio
+import csv
+import json
+import time
+import ssl
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+from numpy import ones, conjugate
+from cmath import pi, exp
+
+##################################
+# Configurations
+##################################
+
+# A 7 column panda dataset to hold the details of an email
+# The column index contains the index number of the email in the panda dataset,
+# and the column Mail_Size contains the size of email in kilobytes.
+columns = ["Index", "Subject", "From", "To", "Date", "Attachment", "Mail_Path",
+           "Mail_Size"]
+
+# The command line options shared by IMAPBrowser.py and IMAPSync.py. They are
+# parsed by the scripts and passed to configure.
+parser = argparse.ArgumentParser(add_help=False)
+parser.add_argument("--username", type=str, default=None)
+parser.add_argument("--backend", choices=["imaplib", "asyncio"],
+                    default="imaplib")
+parser.add_argument("--chunk-size", type=int, default=200)
+parser.add_argument("--fetch-mode", choices=["headers", "full"],
+                    default="headers")
+parser.add_argument("--workers", type=int, default=4)
+parser.add_argument("--timestamp-source", choices=["header", "internaldate"],
+                    default="header")
+parser.add_argument("--repair-metadata", action="store_true")
+parser.add_argument("--store", choices=["files", "sqlite"], default="files")
+parser.add_argument("--import-files", action="store_true")
+parser.add_argument("--filter-since", type=str, default=None)
+parser.add_argument("--filter-before", type=str, default=None)
+parser.add_argument("--filter-sender", action="append", default=None)
+parser.add_argument("--filter-recipient", action="append", default=None)
+parser.add_argument("--filter-folder", action="append", default=None)
+parser.add_argument("--filter-size-bucket", type=int, action="append",
+                    default=None)
+parser.add_argument("--filter-attachment", choices=["yes", "no"],
+                    default=None)
+
+user = None
+
+# The 'imaplib' backend blocks on every command, the 'asyncio' backend runs all
+# connections on one event loop and pipelines the FETCH commands.
+backend = "imaplib"
+
+# The number of mails requested from the IMAP server by a single UID FETCH
+# command. A chunk size of 1 results in one round trip per mail.
+fetch_chunk_size = 200
+
+# In the 'headers' mode only the header fields of the mails listed below and
+# their BODYSTRUCTURE are downloaded, the names of the attachments are derived
+# from the structure. The 'full' mode downloads the whole RFC822 content.
+fetch_mode = "headers"
+header_fields = ["SUBJECT", "FROM", "TO", "DATE"]
+
+# The timestamps of the nodes are taken from the Date header of the mails, or
+# from the INTERNALDATE the server assigned on delivery. The INTERNALDATE is
+# fetched with the mails in either case and replaces a Date header which is
+# missing or cannot be read, and the other way round. The Date header is kept
+# in the panda dataset.
+timestamp_source = "header"
+
+# The number of connections to the IMAP server used to download the mails of
+# several directories at the same time.
+workers = 4
+
+# The number of UID FETCH commands the asyncio backend sends before waiting for
+# their responses.
+pipeline_depth = 4
+
+# The rows of the panda dataset are buffered and appended to the CSV file once
+# the given number of rows is reached or the given number of seconds has
+# passed since the last write.
+write_buffer_rows = 1000
+write_buffer_seconds = 5.0
+
+# The number of Date headers whose conversion into UTC is cached during a run.
+date_cache_size = 10000
+
+# The mails downloaded so far are saved together with the tree graph every
+# given number of seconds, so that an interrupted download resumes after the
+# last saved mail instead of starting over.
+checkpoint_seconds = 60.0
+
+# The mails highlighted in the H2 tree graph can be filtered by several
+# attributes at once, the year chosen on the slider narrows them down further.
+# The criteria given on the command line are the initial values of the filter
+# panel of IMAPBrowser.py, where they can be changed while browsing.
+# The date range is given as YYYY-MM-DD, the size buckets are the ones of the
+# thresholds below in kilobytes, e.g. bucket 0 holds the mails below 10 kB.
+filter_size_thresholds = [10, 100, 1000, 10000]
+filter_criteria = {"since": None, "before": None, "senders": None,
+                   "recipients": None, "folders": None, "size_buckets": None,
+                   "attachment": None}
+
+imap_server_name = "imap.techfak.uni-bielefeld.de"
+
+# path of the csv file containing the panda dataset. It contains the details
+# of the emails.
+data_path = r"./data"
+
+dataset_path = data_path + "/mails.csv"
+
+# path of the metadata of the panda dataset. It contains the number of rows and
+# the maximum Index of the dataset, in total and per directory.
+metadata_path = data_path + "/mails.meta.json"
+
+# path of the pickle dataset. It contains the details of the nodes in the H2
+# graph. It is only read to convert it into the tree dataset.
+pickle_dataset_path = data_path + "/mails.pkl"
+
+# path of the tree dataset. It contains the arrays of a TreeStore holding the
+# nodes in the H2 graph.
+tree_dataset_path = data_path + "/mails.tree.npz"
+
+# path of the layout of the H2 graph, precomputed by IMAPSync.py
+layout_path = data_path + "/mails.layout.npz"
+
+# path of the checkpoint of the download. It tells whether the first download
+# of all directories has been completed and lists the mails which have been
+# skipped, as they could not be read.
+checkpoint_path = data_path + "/mails.checkpoint.json"
+
+# The 'files' store keeps the mails in mails.csv and the tree graph in
+# mails.pkl, the 'sqlite' store keeps both in a single SQLite database.
+store_type = "files"
+database_path = data_path + "/mails.db"
+
+# Corresponding to the month's name in the mail timestamp, name would be
+# replaced by month number.
+month_dict = {"Jan": "01", "Feb": "02", "Mar": "03", "Apr": "04",
+              "May": "05", "Jun": "06", "Jul": "07", "Aug": "08",
+              "Sep": "09", "Oct": "10", "Nov": "11", "Dec": "12"}
+
+
+def configure(options):
+    """
+    Sets the configuration from the command line options parsed by one of the
+    scripts, and creates the directory of the datasets
+
+    Keyword arguments:
+    options: the namespace returned by parse_args
+    """
+
+    global user, backend, fetch_chunk_size, fetch_mode, workers, store_type, \
+        timestamp_source
+
+    user = options.username
+    backend = options.backend
+    fetch_chunk_size = max(1, options.chunk_size)
+    fetch_mode = options.fetch_mode
+    timestamp_source = options.timestamp_source
+    workers = max(1, options.workers)
+    store_type = options.store
+
+    filter_criteria.update({
+        "since": datetime.datetime.strptime(options.filter_since, "%Y-%m-%d")
+        if options.filter_since else None,
+        "before": datetime.datetime.strptime(options.filter_before,
+                                             "%Y-%m-%d")
+        if options.filter_before else None,
+        "senders": options.filter_sender,
+        "recipients": options.filter_recipient,
+        "folders": options.filter_folder,
+        "size_buckets": options.filter_size_bucket,
+        "attachment": {"yes": True, "no": False}.get(
+            options.filter_attachment)})
+
+    try:
+        os.makedirs(data_path)
+    except:
+        print('directory {} already exists'.format(data_path))
+
+
+def _atomic_write(path, writer, mode="w"):
+    """
+    Writes a file through a temporary file, which replaces it once it is
+    complete, so that an interrupted write does not leave a broken file behind
+
+    Keyword arguments:
+    path: path of the file
+    writer: function which writes the content to the open file
+    mode: 'w' for a UTF-8 text file, 'wb' for a binary file
+    """
+
+    temp_path = path + ".tmp"
+    with open(temp_path, mode, encoding="utf-8" if "b" not in mode
+              else None) as f:
+        writer(f)
+    os.replace(temp_path, path)
+
+
+class Node:
+    """
+    A class defining the structure of the tree node and its related properties.
+    The properties of all nodes of a tree are kept in the arrays of a
+    TreeStore, a Node is only a view on one row of these arrays.
+    """
+
+    __slots__ = ("tree", "index")
+
+    def __init__(self, parent=None, depth=0, name=None):
+        """
+        Method to add a new node to the tree of its parent, a node without a
+        parent starts a new tree
+
+        Knowledge arguments:
+        parent: Parent node
+        depth: the depth of the new node
+        name: the label of the node
+        """
+
+        if parent is None:
+            self.tree = TreeStore()
+            self.index = self.tree.add(-1, depth, name)
+        else:
+            self.tree = parent.tree
+            self.index = self.tree.add(parent.index, depth, name)
+
+    @classmethod
+    def view(cls, tree, index):
+        """
+        Creates a view on a node already stored in a tree
+
+        Keyword arguments:
+        tree: the TreeStore holding the node
+        index: the index of the node in the tree
+
+        :return: the node
+        """
+
+        node = cls.__new__(cls)
+        node.tree = tree
+        node.index = index
+        return node
+
+    def __eq__(self, other):
+        return isinstance(other, Node) and self.tree is other.tree and \
+            self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
+
+    @property
+    def parent(self):
+        # to maintain the parent nodes of any node
+        parent = self.tree.parent[self.index]
+        return Node.view(self.tree, int(parent)) if parent >= 0 else None
+
+    @property
+    def children(self):
+        # to maintain the child nodes of any node
+        return [Node.view(self.tree, int(index))
+                for index in self.tree.get_children(self.index)]
+
+    @property
+    def number(self):
+        # the number of the node, i.e. its position in the pickle dataset
+        return self.index + 1
+
+    @property
+    def depth(self):
+        # to maintain the overall depth of the tree at subsequent hierarchy
+        # levels
+        return int(self.tree.depth[self.index])
+
+    @property
+    def name(self):
+        # the label of the node to be used for labelling purpose
+        return self.tree.names[self.index]
+
+    @name.setter
+    def name(self, value):
+        self.tree.names[self.index] = value
+
+    @property
+    def isMail(self):
+        # to check if the node is an Email or a directory
+        return bool(self.tree.is_mail[self.index])
+
+    @isMail.setter
+    def isMail(self, value):
+        self.tree.is_mail[self.index] = value
+        self.tree.time_index = None
+
+    @property
+    def mailID(self):
+        # index number of the mail in mails.csv
+        return int(self.tree.mail_id[self.index])
+
+    @mailID.setter
+    def mailID(self, value):
+        self.tree.mail_id[self.index] = value
+
+    @property
+    def mailSize(self):
+        # to hold the size of all mails directly under one directory
+        return float(self.tree.size[self.index])
+
+    @mailSize.setter
+    def mailSize(self, value):
+        self.tree.size[self.index] = value
+
+    @property
+    def numberOfMails(self):
+        # to hold the total number of mails within a directory
+        return int(self.tree.number_of_mails[self.index])
+
+    @numberOfMails.setter
+    def numberOfMails(self, value):
+        self.tree.number_of_mails[self.index] = value
+
+    @property
+    def timestamp(self):
+        # timestamp to hold the most recent mail timestamp within a directory
+        timestamp = self.tree.timestamp[self.index]
+        if np.isnat(timestamp):
+            return None
+        return timestamp.astype(datetime.datetime)
+
+    @timestamp.setter
+    def timestamp(self, value):
+        self.tree.timestamp[self.index] = \
+            np.datetime64(value, "s") if value is not None else \
+            np.datetime64("NaT")
+        self.tree.time_index = None
+
+    @property
+    def latestTimestamp(self):
+        # the timestamp of the latest mail in the subtree of the node, it is
+        # set by TreeStore.aggregate
+        latest = self.tree.rollups.get("latest_timestamp")
+        if latest is None or np.isnat(latest[self.index]):
+            return None
+        return latest[self.index].astype(datetime.datetime)
+
+    @property
+    def uidValidity(self):
+        # UIDVALIDITY of a directory when it was synchronized last
+        value = self.tree.uid_validity[self.index]
+        return int(value) if value >= 0 else None
+
+    @uidValidity.setter
+    def uidValidity(self, value):
+        self.tree.uid_validity[self.index] = value if value is not None else -1
+
+    @property
+    def uidNext(self):
+        # UIDNEXT of a directory when it was synchronized last
+        value = self.tree.uid_next[self.index]
+        return int(value) if value >= 0 else None
+
+    @uidNext.setter
+    def uidNext(self, value):
+        self.tree.uid_next[self.index] = value if value is not None else -1
+
+    @property
+    def noSelect(self):
+        # a directory with the \Noselect flag, it cannot contain mails
+        return bool(self.tree.no_select[self.index])
+
+    @noSelect.setter
+    def noSelect(self, value):
+        self.tree.no_select[self.index] = value
+
+    @property
+    def position(self):
+        # to hold the 2D position of any node after hyperbolize
+        x, y = self.tree.position[self.index]
+        if np.isnan(x):
+            return []
+        return x, y
+
+    @position.setter
+    def position(self, value):
+        self.tree.position[self.index] = value
+
+    def getmaxdepth(self):
+        """
+        Method to return the maximum depth of the tree graph
+
+        :return: The maximum depth of the tree
+        """
+
+        return self.tree.max_depth
+
+
+class TreeStore:
+    """
+    Keeps the nodes of a tree graph in NumPy arrays, one array per property.
+    The index of a node in the arrays is its number - 1. The children of the
+    nodes are found through offsets into an array of node indices, which is
+    computed from the parents when needed.
+    """
+
+    # the arrays holding the properties of the nodes, with their types and
+    # the values of new nodes
+    columns = [("parent", np.int64, -1),
+               ("depth", np.int32, 0),
+               ("is_mail", np.bool_, False),
+               ("mail_id", np.int64, 0),
+               ("size", np.float64, 0.0),
+               ("number_of_mails", np.int64, 0),
+               ("timestamp", "datetime64[s]", np.datetime64("NaT")),
+               ("uid_validity", np.int64, -1),
+               ("uid_next", np.int64, -1),
+               ("no_select", np.bool_, False)]
+
+    def __init__(self, capacity=1024):
+        """
+        Method to set the various properties useful for the class
+
+        Keyword arguments:
+        capacity: number of nodes the arrays can hold before they are enlarged
+        """
+
+        self.count = 0  # number of nodes in the tree
+        self.max_depth = 0  # maximum depth of the nodes
+        self.names = []  # the labels of the nodes
+
+        for column, dtype, default in self.columns:
+            setattr(self, column, np.full(capacity, default, dtype=dtype))
+        self.position = np.full((capacity, 2), np.nan)
+
+        # the children of node i are child_index[child_offsets[i]:
+        # child_offsets[i + 1]], in the order they have been added
+        self.child_offsets = None
+        self.child_index = None
+
+        # the indices of the nodes of every depth, see get_levels
+        self.levels = None
+
+        # the results of the last call of the method aggregate
+        self.rollups = dict()
+
+        # the mails sorted by the month they were received in, see
+        # get_time_index
+        self.time_index = None
+
+    def __len__(self):
+        return self.count
+
+    def reserve(self, capacity):
+        """
+        Enlarges the arrays, so that they can hold the given number of nodes
+
+        Keyword arguments:
+        capacity: the number of nodes
+        """
+
+        if capacity <= len(self.parent):
+            return
+
+        for column, dtype, default in self.columns:
+            values = np.full(capacity, default, dtype=dtype)
+            values[:self.count] = getattr(self, column)[:self.count]
+            setattr(self, column, values)
+
+        position = np.full((capacity, 2), np.nan)
+        position[:self.count] = self.position[:self.count]
+        self.position = position
+
+    def add(self, parent, depth, name, is_mail=False, size=0.0,
+            timestamp=None):
+        """
+        Adds a node to the tree
+
+        Keyword arguments:
+        parent: index of the parent node, -1 for the root node
+        depth: the depth of the node
+        name: the label of the node
+        is_mail: whether the node is a mail or a directory
+        size: the size of the mails in kilobytes
+        timestamp: the timestamp of the node in datetime format
+
+        :return: the index of the new node
+        """
+
+        if self.count == len(self.parent):
+            self.reserve(2 * self.count)
+
+        index = self.count
+        self.parent[index] = parent
+        self.depth[index] = depth
+        self.is_mail[index] = is_mail
+        self.size[index] = size
+        if timestamp is not None:
+            self.timestamp[index] = np.datetime64(timestamp, "s")
+        self.names.append(name)
+
+        self.count = self.count + 1
+        self.max_depth = max(self.max_depth, depth)
+
+        # the children, the levels and the time index have to be computed
+        # again
+        self.child_offsets = None
+        self.levels = None
+        self.time_index = None
+        return index
+
+    def pop(self):
+        """
+        Removes the node added last, e.g. a mail which could not be stored
+        """
+
+        self.count = self.count - 1
+        for column, dtype, default in self.columns:
+            getattr(self, column)[self.count] = default
+        self.position[self.count] = np.nan
+        self.names.pop()
+
+        self.child_offsets = None
+        self.levels = None
+        self.time_index = None
+
+    def get_children(self, index):
+        """
+        Gets the children of a node
+
+        Keyword arguments:
+        index: the index of the node
+
+        :return: array of the indices of the children
+        """
+
+        if self.child_offsets is None:
+            parent = self.parent[:self.count]
+
+            # A stable sort keeps the children in the order of their indices,
+            # i.e. in the order they have been added.
+            self.child_index = np.argsort(parent, kind="stable")
+            self.child_offsets = np.searchsorted(
+                parent[self.child_index], np.arange(self.count + 1))
+
+        return self.child_index[self.child_offsets[index]:
+                                self.child_offsets[index + 1]]
+
+    def get_levels(self):
+        """
+        Groups the nodes by their depth, the deepest level first. Processing
+        the levels in this order visits the children before their parents.
+
+        :return: list of arrays of node indices, one array per depth > 0
+        """
+
+        if self.levels is None:
+            depth = self.depth[:self.count]
+            order = np.argsort(depth, kind="stable")
+            offsets = np.searchsorted(depth[order],
+                                      np.arange(self.max_depth + 2))
+            self.levels = [order[offsets[level]:offsets[level + 1]]
+                           for level in range(self.max_depth, 0, -1)]
+        return self.levels
+
+    def rollup(self, values, ufunc=np.add):
+        """
+        Combines the values of every node with the values of all nodes in its
+        subtree. Every node is visited once, the children of one level are
+        combined into their parents by a single unbuffered ufunc call.
+
+        Keyword arguments:
+        values: array with one value per node, it is not modified
+        ufunc: the NumPy ufunc combining two values, e.g. np.add or np.maximum
+
+        :return: array with the combined value of every subtree
+        """
+
+        result = np.array(values[:self.count], copy=True)
+        for level in self.get_levels():
+            parents = self.parent[level]
+            valid = parents >= 0
+            ufunc.at(result, parents[valid], result[level[valid]])
+        return result
+
+    def aggregate(self, rollups=None):
+        """
+        Computes the size, the number of mails and the latest timestamp of the
+        mails in every subtree. The results only depend on the mails, so the
+        method can be called again after the tree has been changed.
+
+        Keyword arguments:
+        rollups: dictionary of additional rollups, the name of the rollup as
+                 key and a tuple (values, ufunc) as value, see rollup
+
+        :return: dictionary of the results, the name of the rollup as key
+        """
+
+        is_mail = self.is_mail[:self.count]
+
+        # NaT is the smallest int64 value, so it never wins the maximum
+        timestamps = self.timestamp[:self.count].astype(np.int64)
+        timestamps[~is_mail] = np.iinfo(np.int64).min
+
+        sizes = np.where(is_mail, self.size[:self.count], 0.0)
+        self.rollups = {
+            "size": self.rollup(sizes),
+            "number_of_mails": self.rollup(is_mail.astype(np.int64)),
+            "latest_timestamp": self.rollup(timestamps, np.maximum).astype(
+                "datetime64[s]")}
+        for name, (values, ufunc) in (rollups or dict()).items():
+            self.rollups[name] = self.rollup(np.asarray(values), ufunc)
+
+        # the directories show the values of their subtree
+        directories = ~is_mail
+        self.size[:self.count][directories] = \
+            self.rollups["size"][directories]
+        self.number_of_mails[:self.count][directories] = \
+            self.rollups["number_of_mails"][directories]
+        return self.rollups
+
+    def get_time_index(self):
+        """
+        Sorts the mails by their timestamps. Directories and mails without a
+        timestamp are sorted before all others. The year slider and the date
+        range of the MailFilter both look the mails up in this index.
+
+        :return: tuple of the sorted timestamps, as seconds since 1970, and
+                 the indices of the nodes in the same order
+        """
+
+        if self.time_index is None:
+            # NaT is converted to the smallest integer as well
+            timestamps = self.timestamp[:self.count].astype(np.int64)
+            timestamps[~self.is_mail[:self.count]] = np.iinfo(np.int64).min
+            order = np.argsort(timestamps, kind="stable")
+            self.time_index = (timestamps[order], order)
+        return self.time_index
+
+    def get_mails_of_period(self, year, month=None):
+        """
+        Gets the mails received in a year or in a month of the year
+
+        Keyword arguments:
+        year: the year in which the mails were received
+        month: the month, from 1 to 12, None for the whole year
+
+        :return: array of the indices of the nodes
+        """
+
+        timestamps, order = self.get_time_index()
+        start = np.datetime64("1970-01", "M") + (year - 1970) * 12 + \
+            (month - 1 if month is not None else 0)
+        end = start + (1 if month is not None else 12)
+        return order[np.searchsorted(timestamps, start.astype(
+                         "datetime64[s]").astype(np.int64)):
+                     np.searchsorted(timestamps, end.astype(
+                         "datetime64[s]").astype(np.int64))]
+
+    def node(self, index):
+        return Node.view(self, index)
+
+    def nodes(self):
+        """
+        :return: list of views on all nodes, ordered by their number
+        """
+
+        return [Node.view(self, index) for index in range(self.count)]
+
+    def save(self, path):
+        """
+        Saves the arrays of the tree in the NumPy .npz format
+
+        Keyword arguments:
+        path: path of the file
+        """
+
+        # The labels are stored as one UTF-8 encoded string and the offsets of
+        # the labels in it, so that no pickling is needed.
+        names = [(name or "").encode("utf-8") for name in self.names]
+        name_offsets = np.zeros(self.count + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in names], out=name_offsets[1:])
+        # None and the empty string are told apart by a flag
+        name_none = np.array([name is None for name in self.names],
+                             dtype=np.bool_)
+
+        arrays = {column: getattr(self, column)[:self.count]
+                  for column, dtype, default in self.columns}
+        arrays["timestamp"] = arrays["timestamp"].astype(np.int64)
+        arrays["position"] = self.position[:self.count]
+
+        _atomic_write(path, lambda f: np.savez(
+            f, names=np.frombuffer(b"".join(names), dtype=np.uint8),
+            name_offsets=name_offsets, name_none=name_none, **arrays), "wb")
+
+    @staticmethod
+    def load(path):
+        """
+        Loads a tree saved by the method save
+
+        Keyword arguments:
+        path: path of the file
+
+        :return: the TreeStore
+        """
+
+        with np.load(path) as content:
+            count = len(content["parent"])
+            tree = TreeStore(max(count, 1))
+            tree.count = count
+
+            for column, dtype, default in TreeStore.columns:
+                # files of older versions lack the newer columns, which keep
+                # their default values
+                if column not in content:
+                    continue
+                values = content[column]
+                if column == "timestamp":
+                    values = values.astype("datetime64[s]")
+                getattr(tree, column)[:count] = values
+            tree.position[:count] = content["position"]
+
+            names = content["names"].tobytes()
+            offsets = content["name_offsets"]
+            name_none = content["name_none"]
+
+        tree.names = [None if name_none[i] else
+                      names[offsets[i]:offsets[i + 1]].decode("utf-8")
+                      for i in range(count)]
+        tree.max_depth = int(tree.depth[:count].max()) if count else 0
+        return tree
+
+    @staticmethod
+    def from_nodes(nodes):
+        """
+        Creates a tree from a list of nodes, e.g. the Node objects of a pickle
+        dataset of an older version
+
+        Keyword arguments:
+        nodes: list of nodes, ordered by their number
+
+        :return: the TreeStore
+        """
+
+        tree = TreeStore(max(len(nodes), 1))
+        indices = {id(node): index for index, node in enumerate(nodes)}
+
+        for node in nodes:
+            parent = getattr(node, "parent", None)
+            index = tree.add(indices[id(parent)] if parent is not None
+                             else -1,
+                             node.depth, node.name,
+                             getattr(node, "isMail", False),
+                             getattr(node, "mailSize", 0.0),
+                             getattr(node, "timestamp", None))
+            tree.mail_id[index] = getattr(node, "mailID", 0)
+            tree.number_of_mails[index] = getattr(node, "numberOfMails", 0)
+
+            uid_validity = getattr(node, "uidValidity", None)
+            uid_next = getattr(node, "uidNext", None)
+            tree.uid_validity[index] = \
+                uid_validity if uid_validity is not None else -1
+            tree.uid_next[index] = uid_next if uid_next is not None else -1
+            tree.no_select[index] = getattr(node, "noSelect", False)
+        return tree
+
+
+class LegacyNode:
+    """
+    The Node objects of pickle datasets of older versions are unpickled as
+    instances of this class, their attributes are copied into a TreeStore.
+    """
+    pass
+
+
+class LegacyUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if name == "Node":
+            return LegacyNode
+        return pickle.Unpickler.find_class(self, module, name)
+
+
+class MailFilter:
+    """
+    Filters the mails of a tree graph by their date, sender, recipient,
+    directory, size and attachments at once. For every attribute an index of
+    the nodes of each value is built once, the boolean masks of the values are
+    cached, so that a filter only combines masks.
+    """
+
+    def __init__(self, tree, metadata):
+        """
+        Method to set the various properties useful for the class
+
+        Keyword arguments:
+        tree: the TreeStore holding the nodes
+        metadata: list of tuples (number, sender, recipient, attachment) of
+                  the mails, as returned by get_mail_metadata of the stores
+        """
+
+        self.count = len(tree)
+        self.is_mail = tree.is_mail[:self.count].copy()
+
+        # the mails sorted by their timestamps, for the date ranges, the
+        # index is shared with the year slider
+        self.dates, self.date_order = tree.get_time_index()
+
+        mails = np.flatnonzero(self.is_mail)
+        parents = tree.parent[:self.count][mails]
+        buckets = np.digitize(tree.size[:self.count][mails],
+                              filter_size_thresholds)
+
+        senders = ([], [])  # the addresses and the indices of their mails
+        recipients = ([], [])
+        with_attachment = np.zeros(self.count, dtype=bool)
+
+        # The same headers occur in many mails, each one is parsed only once.
+        addresses = dict()
+        for number, sender, recipient, attachment in metadata:
+            index = number - 1
+            if not 0 <= index < self.count or not self.is_mail[index]:
+                continue
+            for header, values in ((sender, senders),
+                                   (recipient, recipients)):
+                if header not in addresses:
+                    addresses[header] = [
+                        address.lower() for name, address in
+                        email.utils.getaddresses([header or ""])]
+                values[0].extend(addresses[header])
+                values[1].extend([index] * len(addresses[header]))
+            with_attachment[index] = attachment not in (None, "",
+                                                         "No attachment")
+
+        # the indices of the nodes of every value of an attribute
+        self.indices = {
+            "senders": self.group(*senders),
+            "recipients": self.group(*recipients),
+            "folders": {tree.names[parent]: indices for parent, indices in
+                        self.group(parents, mails).items()},
+            "size_buckets": self.group(buckets, mails),
+            "attachment": {True: np.flatnonzero(with_attachment),
+                           False: np.flatnonzero(self.is_mail &
+                                                 ~with_attachment)}}
+
+        self.masks = dict()  # the cached masks, (attribute, value) as key
+
+    @staticmethod
+    def group(values, indices):
+        """
+        Groups indices by their values
+
+        Keyword arguments:
+        values: list of the values
+        indices: list of the indices, one per value
+
+        :return: dictionary with the values as keys and arrays of their
+                 indices as values
+        """
+
+        keys, inverse = np.unique(np.asarray(values), return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        groups = np.split(np.asarray(indices, dtype=np.int64)[order],
+                          np.cumsum(np.bincount(inverse.ravel(),
+                                                minlength=len(keys)))[:-1])
+        return {key.item(): group for key, group in zip(keys, groups)}
+
+    def get_mask(self, attribute, value):
+        """
+        Gets the mask of the mails with a value of an attribute
+
+        Keyword arguments:
+        attribute: the attribute, e.g. senders
+        value: the value of the attribute
+
+        :return: boolean array, True for the mails with the value
+        """
+
+        if attribute in ("senders", "recipients"):
+            value = value.lower()
+        key = (attribute, value)
+        if key not in self.masks:
+            mask = np.zeros(self.count, dtype=bool)
+            mask[self.indices[attribute].get(
+                value, np.zeros(0, dtype=np.int64))] = True
+            self.masks[key] = mask
+        return self.masks[key]
+
+    def get_date_mask(self, since=None, before=None):
+        """
+        Gets the mask of the mails received in a range of time
+
+        Keyword arguments:
+        since: the start of the range in datetime format, None for no limit
+        before: the end of the range, excluded, None for no limit
+
+        :return: boolean array, True for the mails in the range
+        """
+
+        start = np.searchsorted(self.dates, np.iinfo(np.int64).min + 1) \
+            if since is None else \
+            np.searchsorted(self.dates, np.datetime64(since, "s").astype(
+                np.int64))
+        end = len(self.dates) if before is None else \
+            np.searchsorted(self.dates, np.datetime64(before, "s").astype(
+                np.int64))
+        # the ranges covering the same mails share their mask, e.g. a year
+        # chosen on the slider again
+        key = ("dates", int(start), int(end))
+        if key not in self.masks:
+            mask = np.zeros(self.count, dtype=bool)
+            mask[self.date_order[start:end]] = True
+            self.masks[key] = mask
+        return self.masks[key]
+
+    def filter(self, since=None, before=None, senders=None, recipients=None,
+               folders=None, size_buckets=None, attachment=None):
+        """
+        Gets the mails matching all given criteria. A criterion given as a
+        list matches the mails with any of its values, None matches all mails.
+
+        Keyword arguments:
+        since: the start of the date range in datetime format
+        before: the end of the date range, excluded
+        senders: list of the addresses of the senders
+        recipients: list of the addresses of the recipients
+        folders: list of the names of the directories
+        size_buckets: list of the size buckets, see filter_size_thresholds
+        attachment: True for mails with attachments, False for mails without
+
+        :return: boolean array, True for the matching mails
+        """
+
+        mask = self.is_mail.copy()
+        if since is not None or before is not None:
+            mask &= self.get_date_mask(since, before)
+
+        for attribute, values in (("senders", senders),
+                                  ("recipients", recipients),
+                                  ("folders", folders),
+                                  ("size_buckets", size_buckets)):
+            if values is None:
+                continue
+            if len(values) == 1:
+                mask &= self.get_mask(attribute, values[0])
+                continue
+            matches = np.zeros(self.count, dtype=bool)
+            for value in values:
+                matches |= self.get_mask(attribute, value)
+            mask &= matches
+
+        if attachment is not None:
+            mask &= self.get_mask("attachment", bool(attachment))
+        return mask
+
+
+class Login:
+    """
+    Login class consists of the methods that are required to login to the 
+    server.
+    """
+
+    def __init__(self, server_name, l_user):
+        """
+        Method to set the various properties useful for the class
+
+        Knowledge arguments:
+        server_name: URL of the IMAP server
+        l_user: username
+        """
+        
+        self.server_name = server_name
+        self.user = l_user
+
+        # retrieve user's login password, it is kept to open further
+        # connections
+        self.pwd = self.get_credentials()
+
+        # creates a connection over SSL encrypted socket
+        self.svr_obj = self.connect()
+
+        # Check if the login was successful or was denied.
+        if self.svr_obj:
+            print("User " + self.user + " logged in successfully.")
+        else:
+            print("Login for the user " + self.user + " was denied. Please check \
+                  your credentials.")
+
+    def connect(self):
+        """
+        Opens a new connection to the server and logs in the user
+
+        :return: IMAP server object obtained for SSL encrypted connection
+        """
+
+        if backend == "asyncio":
+            svr_obj = AsyncImapConnection(self.server_name)
+        else:
+            svr_obj = imaplib.IMAP4_SSL(self.server_name)
+
+        if svr_obj.login(user=self.user, password=self.pwd):
+            return svr_obj
+        return None
+
+    @staticmethod
+    def get_credentials():
+        """
+        Gets the password of the user. A scheduled run without a terminal
+        reads it from the environment variable IMAP_PASSWORD.
+
+        :return:  password typed on the terminal
+        """
+
+        if os.environ.get("IMAP_PASSWORD") is not None:
+            return os.environ["IMAP_PASSWORD"]
+
+        # The method echoes password when run using PyCharm.
+        # Please use windows CMD to run the script so as not to echo the
+        # password or built-in terminal from PyCharm.
+        # Or use Terminal inside PyCharm to run the code.
+        pwd = getpass.getpass("Enter the password: ", stream=None)
+        return pwd
+
+
+class AsyncImapClient:
+    """
+    An IMAP client based on asyncio. Several commands can be sent before their
+    responses arrive, the responses are read by a single task per connection.
+    """
+
+    # e.g. b'A12 OK [READ-WRITE] SELECT completed'
+    tagged_response = re.compile(
+        rb"^(?P<tag>[A-Z]+\d+) (?P<type>[A-Z]+) ?(?P<data>.*)$")
+
+    # e.g. b'* 12 FETCH (UID 4711 ...' or b'* 7 EXISTS'
+    untagged_status = re.compile(
+        rb"^\* (?P<data>\d+) (?P<type>[A-Z-]+)( (?P<data2>.*))?$")
+
+    # e.g. b'* SEARCH 1 2 3' or b'* OK [UIDVALIDITY 3857529045] UIDs valid'
+    untagged_response = re.compile(rb"^\* (?P<type>[A-Z-]+)( (?P<data>.*))?$")
+    response_code = re.compile(rb"^\[(?P<type>[A-Z-]+)( (?P<data>[^]]*))?\]")
+    literal = re.compile(rb".*\{(?P<size>\d+)\}$")
+
+    def __init__(self, host, port=993, ssl_context=True):
+        """
+        Method to set the various properties useful for the class
+
+        Keyword arguments:
+        host: URL of the IMAP server
+        port: port of the IMAP server
+        ssl_context: True for the default SSL context, an ssl.SSLContext, or
+                     None for an unencrypted connection
+        """
+
+        self.host = host
+        self.port = port
+        if ssl_context is True:
+            ssl_context = ssl.create_default_context()
+        self.ssl_context = ssl_context
+
+        self.reader = None
+        self.writer = None
+        self.reader_task = None
+        self.tag_number = 0
+
+        # the futures of the commands waiting for their tagged response
+        self.pending = dict()
+
+        # untagged responses by their type, like imaplib.IMAP4 stores them
+        self.untagged_responses = dict()
+
+    async def connect(self):
+        """
+        Opens the connection and starts reading the responses
+        """
+
+        # Lines of e.g. BODYSTRUCTURE responses may exceed the default limit
+        # of the stream reader.
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port, ssl=self.ssl_context, limit=2 ** 24)
+
+        greeting = await self.reader.readline()
+        if not greeting.startswith((b"* OK", b"* PREAUTH")):
+            raise imaplib.IMAP4.error("Unexpected greeting: %s" % greeting)
+
+        self.reader_task = asyncio.ensure_future(self.read_responses())
+
+    def send(self, name, *args):
+        """
+        Sends a command without waiting for its response
+
+        Keyword arguments:
+        name: name of the command
+        args: arguments of the command, None is skipped like imaplib does
+
+        :return: future which results in the type and data of the tagged
+                 response
+        """
+
+        self.tag_number = self.tag_number + 1
+        tag = "A" + str(self.tag_number)
+
+        line = " ".join([tag, name] + [str(arg) for arg in args
+                                       if arg is not None])
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[tag.encode("utf-8")] = future
+        self.writer.write(line.encode("utf-8") + b"\r\n")
+        return future
+
+    async def command(self, name, *args):
+        """
+        Sends a command and waits for its response
+
+        Keyword arguments:
+        name: name of the command
+        args: arguments of the command
+
+        :return: the type and data of the tagged response
+        """
+
+        future = self.send(name, *args)
+        await self.writer.drain()
+        return await future
+
+    async def pipeline(self, commands):
+        """
+        Sends several commands at once and waits for all their responses
+
+        Keyword arguments:
+        commands: list of tuples of the name and the arguments of a command
+
+        :return: list of the types and data of the tagged responses
+        """
+
+        futures = [self.send(*command) for command in commands]
+        await self.writer.drain()
+        return [await future for future in futures]
+
+    async def logout(self):
+        """
+        Logs out and closes the connection
+        """
+
+        try:
+            await self.command("LOGOUT")
+        finally:
+            await self.close()
+
+    async def close(self):
+        """
+        Closes the connection without logging out, e.g. after it failed
+        """
+
+        self.writer.close()
+        self.reader_task.cancel()
+
+        # the commands still waiting for their response fail at once, e.g.
+        # those of a worker thread being stopped
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(
+                    imaplib.IMAP4.abort("Connection closed"))
+        self.pending = dict()
+
+    async def read_responses(self):
+        """
+        Reads the responses of the server until the connection is closed
+        """
+
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("Connection closed by server")
+                await self.read_response(line.rstrip(b"\r\n"))
+        except Exception as ex:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ex)
+            self.pending = dict()
+
+    async def read_response(self, line):
+        """
+        Processes one response, literals following the line are read as well
+
+        Keyword arguments:
+        line: the first line of the response
+        """
+
+        match = self.tagged_response.match(line)
+        if match and match.group("tag") in self.pending:
+            data = match.group("data")
+            code = self.response_code.match(data)
+            if code:
+                self.append_untagged(code.group("type").decode("utf-8"),
+                                     code.group("data") or b"")
+            future = self.pending.pop(match.group("tag"))
+            future.set_result((match.group("type").decode("utf-8"), [data]))
+            return
+
+        # continuation requests are not used by the commands sent
+        if line.startswith(b"+"):
+            return
+
+        match = self.untagged_status.match(line)
+        if match:
+            data = match.group("data")
+            if match.group("data2") is not None:
+                data = data + b" " + match.group("data2")
+        else:
+            match = self.untagged_response.match(line)
+            if match is None:
+                return
+            data = match.group("data") or b""
+        response_type = match.group("type").decode("utf-8")
+
+        # A line followed by a literal is stored as a tuple, the same way
+        # imaplib does.
+        literal = self.literal.match(data)
+        while literal:
+            value = await self.reader.readexactly(int(literal.group("size")))
+            self.append_untagged(response_type, (data, value))
+            data = (await self.reader.readline()).rstrip(b"\r\n")
+            literal = self.literal.match(data)
+        self.append_untagged(response_type, data)
+
+        if response_type in ("OK", "NO", "BAD"):
+            code = self.response_code.match(data)
+            if code:
+                self.append_untagged(code.group("type").decode("utf-8"),
+                                     code.group("data") or b"")
+
+    def append_untagged(self, response_type, data):
+        """
+        Stores an untagged response
+
+        Keyword arguments:
+        response_type: type of the response, e.g. FETCH
+        data: data of the response
+        """
+
+        self.untagged_responses.setdefault(response_type, []).append(data)
+
+
+class AsyncImapConnection:
+    """
+    Offers the methods of imaplib.IMAP4 used by ImapParse on top of
+    AsyncImapClient. All connections share one event loop running in a
+    background thread, so the connections of the worker threads wait for the
+    server at the same time.
+    """
+
+    loop = None
+    loop_lock = threading.Lock()
+
+    def __init__(self, host, port=993, ssl_context=True):
+        """
+        Method to set the various properties useful for the class
+
+        Keyword arguments:
+        host: URL of the IMAP server
+        port: port of the IMAP server
+        ssl_context: True for the default SSL context, an ssl.SSLContext, or
+                     None for an unencrypted connection
+        """
+
+        self.client = AsyncImapClient(host, port, ssl_context)
+        self.run(self.client.connect())
+
+    @staticmethod
+    def get_loop():
+        """
+        Gets the event loop shared by all connections, it is started on first
+        use
+
+        :return: the event loop
+        """
+
+        with AsyncImapConnection.loop_lock:
+            if AsyncImapConnection.loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever,
+                                          daemon=True)
+                thread.start()
+                AsyncImapConnection.loop = loop
+        return AsyncImapConnection.loop
+
+    def run(self, coroutine):
+        """
+        Runs a coroutine on the event loop and waits for its result
+
+        Keyword arguments:
+        coroutine: the coroutine to be run
+
+        :return: the result of the coroutine
+        """
+
+        return asyncio.run_coroutine_threadsafe(coroutine,
+                                                self.get_loop()).result()
+
+    def simple_command(self, name, *args):
+        """
+        Sends a command and waits for its tagged response
+
+        Keyword arguments:
+        name: name of the command
+        args: arguments of the command
+
+        :return: the type and data of the tagged response
+        """
+
+        typ, dat = self.run(self.client.command(name, *args))
+        if typ == "BAD":
+            raise imaplib.IMAP4.error("%s command error: %s %s" %
+                                      (name, typ, dat))
+        return typ, dat
+
+    def untagged_response(self, typ, dat, name):
+        """
+        Takes the untagged responses of a type, like imaplib does
+
+        Keyword arguments:
+        typ: type of the tagged response
+        dat: data of the tagged response
+        name: type of the untagged responses to be taken
+
+        :return: the type of the tagged response and the untagged data
+        """
+
+        if typ == "NO":
+            return typ, dat
+        return typ, self.client.untagged_responses.pop(name, [None])
+
+    def login(self, user, password):
+        typ, dat = self.simple_command("LOGIN", self.quote(user),
+                                       self.quote(password))
+        if typ != "OK":
+            raise imaplib.IMAP4.error(dat[-1])
+        return typ, dat
+
+    def logout(self):
+        self.run(self.client.logout())
+        return "BYE", [None]
+
+    def shutdown(self):
+        # closes the connection like imaplib does, without a LOGOUT command
+        # which a broken connection would never answer
+        self.run(self.client.close())
+
+    def select(self, mailbox="INBOX", readonly=False):
+        # flush the responses of the previously selected directory
+        self.client.untagged_responses = dict()
+        name = "EXAMINE" if readonly else "SELECT"
+        typ, dat = self.simple_command(name, mailbox)
+        if typ != "OK":
+            return typ, dat
+        return self.untagged_response(typ, dat, "EXISTS")
+
+    def list(self, directory='""', pattern="*"):
+        typ, dat = self.simple_command("LIST", directory, pattern)
+        return self.untagged_response(typ, dat, "LIST")
+
+    def status(self, mailbox, names):
+        typ, dat = self.simple_command("STATUS", mailbox, names)
+        return self.untagged_response(typ, dat, "STATUS")
+
+    def fetch(self, message_set, message_parts):
+        typ, dat = self.simple_command("FETCH", message_set, message_parts)
+        return self.untagged_response(typ, dat, "FETCH")
+
+    def uid(self, command, *args):
+        command = command.upper()
+        typ, dat = self.simple_command("UID", command, *args)
+        if command in ("SEARCH", "SORT", "THREAD"):
+            return self.untagged_response(typ, dat, command)
+        return self.untagged_response(typ, dat, "FETCH")
+
+    def uid_pipeline(self, command, message_sets, *args):
+        """
+        Sends a UID command for several message sets at once
+
+        Keyword arguments:
+        command: the UID command, e.g. FETCH
+        message_sets: list of the message sets, one command is sent for each
+        args: the further arguments of the command
+
+        :return: the type of the tagged responses and the untagged data of all
+                 commands
+        """
+
+        command = command.upper()
+        responses = self.run(self.client.pipeline(
+            [("UID", command, message_set) + args
+             for message_set in message_sets]))
+
+        for typ, dat in responses:
+            if typ == "BAD":
+                raise imaplib.IMAP4.error("UID command error: %s %s" %
+                                          (typ, dat))
+            if typ != "OK":
+                return typ, dat
+        return self.untagged_response("OK", None, command)
+
+    def response(self, code):
+        return code, self.client.untagged_responses.pop(code, [None])
+
+    @staticmethod
+    def quote(arg):
+        """
+        Quotes a string argument, like imaplib does for the password
+        """
+
+        arg = arg.replace("\\", "\\\\")
+        arg = arg.replace('"', '\\"')
+        return '"' + arg + '"'
+
+
+class FetchResponse:
+    """
+    A class that contains methods to parse the response of a FETCH command
+    """
+
+    # Every message in the response starts with its sequence number, e.g.
+    # b'12 (UID 4711 RFC822.SIZE 2345 RFC822 {2345}'
+    message_start = re.compile(rb"^\s*\d+ \(")
+
+    # a string sent as literal is announced by its size at the end of the line
+    literal_size = re.compile(r"\{\d+\}$")
+
+    @staticmethod
+    def parse(data):
+        """
+        Splits the response of a FETCH command into the data items of every
+        message
+
+        Keyword arguments:
+        data: the list of the data returned by imaplib for a FETCH command
+
+        :return: a dictionary with the UID of every message as key and a
+                 dictionary of the data items of the message as value
+        """
+
+        messages = dict()
+
+        for segments in FetchResponse.split_messages(data):
+            tokens = FetchResponse.tokenize(segments)
+            response = FetchResponse.build(tokens)
+
+            # The response of a message is of the form [number, [items]], the
+            # items being pairs of the name of the data item and its value.
+            if len(response) < 2 or not isinstance(response[1], list):
+                continue
+
+            items = response[1]
+            items = {str(items[i]).upper(): items[i + 1]
+                     for i in range(0, len(items) - 1, 2)}
+
+            # Unsolicited FETCH responses, e.g. flag updates, do not carry a
+            # UID and are of no use here.
+            if "UID" in items:
+                messages[int(items["UID"])] = items
+
+        return messages
+
+    @staticmethod
+    def split_messages(data):
+        """
+        Groups the lines and literals of the response by message
+
+        Keyword arguments:
+        data: the list of the data returned by imaplib for a FETCH command
+
+        :return: a list containing for every message a list of
+                 (line, literal) tuples
+        """
+
+        messages = []
+
+        for item in data:
+            if item is None:
+                continue
+
+            # imaplib returns a line followed by a literal as a tuple
+            if isinstance(item, tuple):
+                line, literal = item[0], item[1]
+            else:
+                line, literal = item, None
+
+            if FetchResponse.message_start.match(line):
+                messages.append([])
+
+            if messages:
+                messages[-1].append((line, literal))
+
+        return messages
+
+    @staticmethod
+    def tokenize(segments):
+        """
+        Splits the response of a message into parentheses, atoms, quoted
+        strings and literals
+
+        Keyword arguments:
+        segments: list of (line, literal) tuples of a message
+
+        :return: a list of (kind, value) tuples
+        """
+
+        tokens = []
+
+        for line, literal in segments:
+            text = line.decode("utf-8", "replace")
+            if literal is not None:
+                text = FetchResponse.literal_size.sub("", text)
+
+            i = 0
+            while i < len(text):
+                ch = text[i]
+                if ch in " \r\n":
+                    i = i + 1
+                elif ch == "(":
+                    tokens.append(("open", None))
+                    i = i + 1
+                elif ch == ")":
+                    tokens.append(("close", None))
+                    i = i + 1
+                elif ch == '"':
+                    # quoted string, a backslash escapes the next character
+                    value = []
+                    i = i + 1
+                    while i < len(text) and text[i] != '"':
+                        if text[i] == "\\":
+                            i = i + 1
+                        value.append(text[i:i + 1])
+                        i = i + 1
+                    tokens.append(("string", "".join(value)))
+                    i = i + 1
+                else:
+                    # Atoms like BODY[HEADER.FIELDS (SUBJECT)] contain spaces
+                    # and parentheses within the square brackets.
+                    start = i
+                    while i < len(text) and text[i] not in ' ()"':
+                        if text[i] == "[":
+                            i = text.find("]", i)
+                            if i < 0:
+                                i = len(text)
+                                break
+                        i = i + 1
+                    tokens.append(("atom", text[start:i]))
+
+            if literal is not None:
+                tokens.append(("literal", literal))
+
+        return tokens
+
+    @staticmethod
+    def build(tokens):
+        """
+        Builds nested lists out of the tokens of a message
+
+        Keyword arguments:
+        tokens: list of (kind, value) tuples
+
+        :return: nested list of the values, NIL is returned as None
+        """
+
+        stack = [[]]
+
+        for kind, value in tokens:
+            if kind == "open":
+                nested = []
+                stack[-1].append(nested)
+                stack.append(nested)
+            elif kind == "close":
+                if len(stack) > 1:
+                    stack.pop()
+            elif kind == "atom" and value.upper() == "NIL":
+                stack[-1].append(None)
+            else:
+                stack[-1].append(value)
+
+        return stack[0]
+
+    @staticmethod
+    def get_item(items, prefix):
+        """
+        Gets a data item by the start of its name, as servers may name e.g.
+        BODY.PEEK[HEADER.FIELDS (DATE)] in their response slightly different
+
+        Keyword arguments:
+        items: the data items of a message
+        prefix: the start of the name of the data item
+
+        :return: value of the data item or None
+        """
+
+        for name, value in items.items():
+            if name.startswith(prefix):
+                return value
+        return None
+
+    @staticmethod
+    def size(data):
+        """
+        Computes the number of bytes of the response of a FETCH command
+
+        Keyword arguments:
+        data: the list of the data returned by imaplib for a FETCH command
+
+        :return: size of the response in bytes
+        """
+
+        size = 0
+        for item in data:
+            if isinstance(item, tuple):
+                size = size + sum(len(i) for i in item if i is not None)
+            elif item is not None:
+                size = size + len(item)
+        return size
+
+
+class DateParser:
+    """
+    Converts the Date header of the mails into naive datetime objects in UTC.
+    The common form of RFC 2822, e.g. 'Sun, 26 Nov 2017 16:41:25 +0100', is
+    matched by a regular expression, which also accepts a missing weekday,
+    single-digit days, missing seconds, two-digit years and the obsolete time
+    zone names. Other forms are left to email.utils. The results are cached,
+    as the header of a mail is usually converted more than once.
+    """
+
+    months = {"jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+              "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12}
+
+    # the offsets of the obsolete time zone names in minutes, other names,
+    # like the military zones, are treated as UTC
+    zones = {"ut": 0, "utc": 0, "gmt": 0, "z": 0,
+             "est": -300, "edt": -240, "cst": -360, "cdt": -300,
+             "mst": -420, "mdt": -360, "pst": -480, "pdt": -420}
+
+    # Numeric time zones other than +hhmm, e.g. +01 or +01:00, are left to
+    # email.utils, which reads their digits differently.
+    date_pattern = re.compile(
+        r"\s*(?:[A-Za-z]+\s*,?\s*)?(\d{1,2})[\s-]+([A-Za-z]{3})[A-Za-z]*\.?"
+        r"[\s-]+(\d{2,4})\s+(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?\s*"
+        r"(?:([+-])(\d{2})(\d{2})|([A-Za-z]+)|$)(?=\s|$)")
+
+    def __init__(self, cache_size=10000):
+        """
+        Method to set the various properties useful for the class
+
+        Keyword arguments:
+        cache_size: number of converted headers kept, the cache is emptied
+                    once it is full
+        """
+
+        self.cache = dict()
+        self.cache_size = cache_size
+
+        # the time zone offsets as timedelta by their minutes, creating a
+        # timedelta takes longer than the rest of the conversion
+        self.offsets = dict()
+
+    def parse(self, date):
+        """
+        Converts a Date header, the result is looked up in the cache first
+
+        Keyword arguments:
+        date: the Date header of a mail
+
+        :return: the timestamp in UTC as datetime, None if the header is
+                 missing or cannot be read
+        """
+
+        try:
+            return self.cache[date]
+        except KeyError:
+            pass
+
+        timestamp = self.convert(date)
+        if len(self.cache) >= self.cache_size:
+            self.cache.clear()
+        self.cache[date] = timestamp
+        return timestamp
+
+    def convert(self, date):
+        """
+        Converts a Date header without using the cache
+
+        Keyword arguments:
+        date: the Date header of a mail
+
+        :return: the timestamp in UTC as datetime, None if the header is
+                 missing or cannot be read
+        """
+
+        if not date:
+            return None
+
+        match = self.date_pattern.match(date)
+        if match is not None:
+            day, month, year, hour, minute, second, sign, zone_hours, \
+                zone_minutes, zone_name = match.groups()
+            month = self.months.get(month.lower())
+            year = int(year)
+
+            # RFC 2822 maps the years 00 to 49 to 2000 to 2049, the other
+            # two- and three-digit years are counted from 1900
+            if year < 50 and len(match.group(3)) == 2:
+                year = year + 2000
+            elif year < 1000:
+                year = year + 1900
+
+            if sign is not None:
+                offset = int(zone_hours) * 60 + int(zone_minutes)
+                if sign == "-":
+                    offset = -offset
+            else:
+                offset = self.zones.get((zone_name or "").lower(), 0)
+
+            if offset not in self.offsets:
+                self.offsets[offset] = datetime.timedelta(minutes=offset)
+
+            try:
+                if month is not None:
+                    # a leap second is counted as the last second of the
+                    # minute
+                    return datetime.datetime(
+                        year, month, int(day), int(hour), int(minute),
+                        min(int(second or 0), 59)) - self.offsets[offset]
+            except (ValueError, OverflowError):
+                pass
+
+        # obsolete forms, e.g. with the year before the time
+        parts = email.utils.parsedate_tz(date)
+        if parts is None:
+            return None
+        try:
+            return datetime.datetime(*parts[:5], min(parts[5], 59)) - \
+                datetime.timedelta(seconds=parts[9] or 0)
+        except (ValueError, OverflowError):
+            return None
+
+
+class DatasetMetadata:
+    """
+    Keeps the number of rows and the maximum Index of the panda dataset, in
+    total and per directory, in a JSON file next to the CSV file. The next
+    Index is thus known without reading the whole CSV file.
+    """
+
+    def __init__(self, dataset_path, metadata_path):
+        """
+        Method to set the various properties useful for the class
+
+        Keyword arguments:
+        dataset_path: path of the CSV file of the panda dataset
+        metadata_path: path of the JSON file holding the metadata
+        """
+
+        self.dataset_path = dataset_path
+        self.metadata_path = metadata_path
+        self.reset()
+
+    def reset(self):
+        """
+        Sets the metadata of an empty dataset
+        """
+
+        self.rows = 0
+        self.max_index = 0
+
+        # the number of rows and the maximum Index per directory
+        self.folders = dict()
+
+        # The size of the CSV file the metadata belongs to. The CSV file may
+        # have been changed or restored without the metadata, e.g. after a
+        # failed synchronization.
+        self.csv_size = 0
+
+    def next_index(self):
+        return self.max_index + 1
+
+    def add(self, index, folder):
+        """
+        Adds a row to the metadata
+
+        Keyword arguments:
+        index: value of the column Index of the row
+        folder: value of the column Mail_Path of the row
+        """
+
+        self.rows = self.rows + 1
+        self.max_index = max(self.max_index, index)
+
+        folder_rows, folder_index = self.folders.get(folder, (0, 0))
+        self.folders[folder] = (folder_rows + 1, max(folder_index, index))
+
+    def add_rows(self, rows, columns):
+        """
+        Adds the rows appended to the CSV file to the metadata
+
+        Keyword arguments:
+        rows: list of rows in the order of the columns
+        columns: the columns of the panda dataset
+        """
+
+        index_column = columns.index("Index")
+        folder_column = columns.index("Mail_Path")
+        for row in rows:
+            self.add(int(row[index_column]), row[folder_column])
+
+    def to_dict(self):
+        return {"rows": self.rows, "max_index": self.max_index,
+                "csv_size": self.csv_size,
+                "folders": {name: {"rows": rows, "max_index": index}
+                            for name, (rows, index) in self.folders.items()}}
+
+    def from_dict(self, content):
+        self.rows = content["rows"]
+        self.max_index = content["max_index"]
+        self.csv_size = content["csv_size"]
+        self.folders = {name: (folder["rows"], folder["max_index"])
+                        for name, folder in content["folders"].items()}
+
+    def load(self):
+        """
+        Reads the metadata, it is rebuilt from the CSV file if it is missing
+        or does not belong to the current CSV file
+
+        :return: True if the stored metadata could be used, else False
+        """
+
+        self.reset()
+
+        if not os.path.isfile(self.dataset_path):
+            return True
+
+        try:
+            with open(self.metadata_path, encoding="utf-8") as f:
+                self.from_dict(json.load(f))
+
+            if self.csv_size == os.path.getsize(self.dataset_path):
+                return True
+            print("The metadata of the panda dataset is outdated.")
+        except Exception as ex:
+            print("The metadata of the panda dataset could not be read.")
+            print(ex)
+
+        self.rebuild()
+        return False
+
+    def save(self):
+        """
+        Writes the metadata for the current state of the CSV file
+        """
+
+        self.csv_size = os.path.getsize(self.dataset_path) \
+            if os.path.isfile(self.dataset_path) else 0
+
+        _atomic_write(self.metadata_path,
+                      lambda f: json.dump(self.to_dict(), f))
+
+    def rebuild(self):
+        """
+        Computes the metadata by reading the CSV file once and saves it
+        """
+
+        print("Rebuilding the metadata from " + self.dataset_path + ".")
+        self.reset()
+
+        if os.path.isfile(self.dataset_path):
+            with open(self.dataset_path, encoding="utf-8", errors="replace",
+                      newline="") as f:
+                reader = csv.reader(f)
+
+                # A file left empty by an interrupted first download has no
+                # header, its metadata is the one of an empty dataset.
+                header = next(reader, None) or []
+                if "Index" in header and "Mail_Path" in header:
+                    index_column = header.index("Index")
+                    folder_column = header.index("Mail_Path")
+                else:
+                    reader = []
+
+                for row in reader:
+                    # rows which cannot be parsed are skipped, the same way
+                    # read_csv(error_bad_lines=False) did
+                    try:
+                        if len(row) != len(header):
+                            continue
+                        self.add(int(row[index_column]), row[folder_column])
+                    except ValueError:
+                        continue
+
+        self.save()
+
+    def repair(self):
+        """
+        Compares the stored metadata with the one computed from the CSV file
+        and replaces it, if they differ
+        """
+
+        stored = None
+        if os.path.isfile(self.metadata_path):
+            try:
+                with open(self.metadata_path, encoding="utf-8") as f:
+                    stored = json.load(f)
+            except Exception as ex:
+                print("The metadata of the panda dataset could not be read.")
+                print(ex)
+
+        self.rebuild()
+
+        if stored == self.to_dict():
+            print("The metadata of the panda dataset is correct.")
+        else:
+            print("The metadata of the panda dataset has been repaired.")
+        print("{0} rows, maximum Index {1}, {2} directories.".format(
+            self.rows, self.max_index, len(self.folders)))
+
+
+class RecordWriter:
+    """
+    Appends rows to the CSV file of the panda dataset. The rows are buffered
+    and written in bulk, instead of opening the file for every single mail.
+    """
+
+    def __init__(self, path, columns, max_rows=1000, max_seconds=5.0,
+                 metadata=None):
+        """
+        Method to set the various properties useful for the class
+
+        Keyword arguments:
+        path: path of the CSV file
+        columns: the columns of the panda dataset, written as header if the
+                 file does not exist yet
+        max_rows: number of buffered rows which triggers a write
+        max_seconds: number of seconds since the last write which triggers a
+                     write
+        metadata: DatasetMetadata updated after every write, if any
+        """
+
+        self.path = path
+        self.columns = columns
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.metadata = metadata
+
+        self.rows = []  # the rows not written to the file yet
+        self.last_flush = time.monotonic()
+
+    def write(self, row, node=None, uid=None):
+        """
+        Adds a row to the buffer, the buffer is written if it is full or old
+        enough
+
+        Keyword arguments:
+        row: list of values in the order of the columns
+        node: the node of the mail, not part of the CSV file, it names the
+              mail in the error message
+        uid: the UID of the mail, not part of the CSV file, it names the
+             mail in the error message
+
+        :raises ValueError: if a field cannot be written, see check_row
+        """
+
+        self.check_row(row, node, uid)
+        self.rows.append(row)
+
+        if len(self.rows) >= self.max_rows or \
+                time.monotonic() - self.last_flush >= self.max_seconds:
+            self.flush()
+
+    @staticmethod
+    def check_row(row, node=None, uid=None, line_breaks=True):
+        """
+        Rejects a row which cannot be written as it is, before it is buffered.
+        A header holding bytes which are not UTF-8 keeps them as surrogates,
+        which cannot be encoded, and would fail the write of the whole buffer.
+        A carriage return is not quoted by the writer if the line terminator
+        is a line feed, so it would split the row in two.
+
+        Keyword arguments:
+        row: list of values in the order of the columns
+        node: the node of the mail, it names the mail in the error message
+        uid: the UID of the mail, it names the mail in the error message
+        line_breaks: whether carriage returns are rejected as well
+        """
+
+        for value in row:
+            if not isinstance(value, str):
+                continue
+            try:
+                value.encode("utf-8")
+                if line_breaks and "\r" in value and \
+                        "\r" not in os.linesep:
+                    raise ValueError("carriage return")
+            except (UnicodeError, ValueError) as ex:
+                raise ValueError(
+                    "The field {0!r} of the mail with UID {1} in {2} cannot "
+                    "be written: {3}".format(
+                        value, int(uid) if uid is not None else None,
+                        node.parent.name if node is not None and
+                        node.parent is not None else None, ex))
+
+    def flush(self):
+        """
+        Appends the buffered rows to the CSV file, the header is written if
+        the file does not exist yet
+        """
+
+        self.last_flush = time.monotonic()
+        if not self.rows:
+            return
+
+        write_header = not os.path.isfile(self.path) or \
+            os.path.getsize(self.path) == 0
+
+        # The same format as DataFrame.to_csv writes, so that the file can be
+        # read back by pandas.
+        with open(self.path, 'a', encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, lineterminator=os.linesep)
+            if write_header:
+                writer.writerow(self.columns)
+            writer.writerows(self.rows)
+
+        if self.metadata is not None:
+            self.metadata.add_rows(self.rows, self.columns)
+            self.metadata.save()
+
+        self.rows = []
+
+
+class Checkpoint:
+    """
+    Keeps the state of the download which is not part of the tree graph in a
+    JSON file. The position of the download in every directory is the UIDNEXT
+    of its node, which is saved with the tree graph.
+    """
+
+    def __init__(self, path, seconds=60.0):
+        """
+        Method to set the various properties useful for the class
+
+        Keyword arguments:
+        path: path of the JSON file
+        seconds: number of seconds between two checkpoints
+        """
+
+        self.path = path
+        self.seconds = seconds
+        self.last_save = time.monotonic()
+
+        # whether the first download of all directories has been completed
+        self.complete = True
+
+        # the UIDs of the mails which have been skipped, per directory
+        self.failed = dict()
+
+    def load(self):
+        """
+        Reads the checkpoint. Datasets of older versions do not have one,
+        their first download has been completed.
+        """
+
+        self.complete = True
+        self.failed = dict()
+
+        if not os.path.isfile(self.path):
+            return
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                content = json.load(f)
+            self.complete = content["complete"]
+            self.failed = content["failed"]
+        except Exception as ex:
+            # Resuming the first download also works for a complete one, it
+            # only downloads the mails which are missing.
+            print("The checkpoint could not be read.")
+            print(ex)
+            self.complete = False
+
+    def is_due(self):
+        return time.monotonic() - self.last_save >= self.seconds
+
+    def add_failure(self, folder, uid):
+        """
+        Records a mail which has been skipped
+
+        Keyword arguments:
+        folder: name of the directory of the mail
+        uid: the UID of the mail
+        """
+
+        uids = self.failed.setdefault(folder, [])
+        if uid not in uids:
+            uids.append(uid)
+
+    def remove_failure(self, folder, uid):
+        """
+        Removes a skipped mail once it has been stored, or deleted on the
+        server
+
+        Keyword arguments:
+        folder: name of the directory of the mail
+        uid: the UID of the mail
+        """
+
+        uids = self.failed.get(folder)
+        if uids is None or uid not in uids:
+            return
+        uids.remove(uid)
+        if not uids:
+            del self.failed[folder]
+
+    def save(self):
+        """
+        Writes the checkpoint
+        """
+
+        self.last_save = time.monotonic()
+
+        _atomic_write(self.path, lambda f: json.dump(
+            {"complete": self.complete, "failed": self.failed}, f))
+
+
+class ImapParse:
+    """
+    Class that defines all the methods required to parse an IMAP server
+    """
+
+    # The years obtained would be used for the first and the last tick on the
+    # widget respectively.
+    latestYear = None
+    oldestYear = None
+
+    # a line of the LIST response, e.g. (\HasNoChildren) "/" "INBOX/Drafts"
+    list_response = re.compile(
+        r'\((?P<flags>[^)]*)\) (?P<separator>"(?:[^"\\]|\\.)*"|NIL) '
+        r'(?P<name>.*)$')
+
+    def __init__(self, ip_svr, ip_root, ip_index, ip_columns, ip_dataset_path, 
+                 ip_nodetext, ip_month_dict, ip_pickle_dataframe_list,
+                 ip_connect=None, ip_store=None):
+        """
+        Method to set the various properties useful for the class
+
+        Knowledge arguments
+        ip_svr: IMAP server object obtained for SSL encrypted connection
+        ip_root: root node of the H@ tree graph
+        ip_index: the index number of the panda dataset row
+        ip_columns: list of the columns in the panda dataset
+        ip_dataset_path: the local system path where panda dataset would be 
+                         written
+        ip_nodetext: list containing the names of the nodes to be displayed 
+                     when the tree graph is rendered
+        ip_month_dict: dictionary to help to convert the month names to their 
+                       respective calendar month numbers
+        ip_pickle_dataframe_list: a list containing the nodes of the tree graph
+        ip_connect: a function opening a further connection to the server, used
+                    to download the mails of several directories at once
+        ip_store: the store of the mails and the tree graph, PickleDataset if
+                  not given
+        """
+
+        self.svr = ip_svr  # variable to hold the server object
+        self.root = ip_root  # to hold the root node of the H2 tree
+        
+        # to hold the index of the items in the panda dataset
+        self.index = ip_index
+
+        # holds the list of columns that would be populated in panda dataset
+        self.columns = ip_columns
+        
+        # holds the path of the dataset on the local system
+        self.dataset_path = ip_dataset_path
+        
+        # holds the list of the labels for the nodes in H2 tree graph
+        self.nodeText = ip_nodetext
+
+        # a dictionary holding the month and month number for timestamp
+        # conversion
+        self.month_dict = ip_month_dict
+
+        # converts the Date headers of the mails into timestamps in UTC
+        self.date_parser = DateParser(date_cache_size)
+        
+        # list to contain the directories directly under root directory /
+        self.root_directories = []
+        
+        # list containing all node objects from H2 tree graph
+        self.pickle_dataframe_list = ip_pickle_dataframe_list
+
+        # the adjacent connections between the nodes of the H2 tree graph
+        self.adjacency_list = []
+
+        # instance of the class ImapTree
+        self.imap_tree = ImapTree(self.nodeText, self.pickle_dataframe_list, 
+                                  self.adjacency_list)
+        
+        # flag to check whether the call is for synchronization or not
+        self.sync = False
+        
+        self.max_depth = 0  # holds the maximum depth of the H2 tree graph
+        self.node_dict = dict()
+
+        # number of mails requested by a single UID FETCH command
+        self.fetch_chunk_size = fetch_chunk_size
+
+        # whether only the headers or the whole mails should be downloaded
+        self.fetch_mode = fetch_mode
+
+        # whether the timestamps are taken from the Date header or from the
+        # INTERNALDATE of the mails
+        self.timestamp_source = timestamp_source
+
+        # number of bytes received in response to the FETCH commands
+        self.bytes_transferred = 0
+
+        # the names of the sub-directories of every directory as reported by
+        # the LIST command, and the directories which cannot be selected
+        self.folder_tree = {None: []}
+        self.noselect = set()
+
+        # Every worker thread opens its own connection to the server, as an
+        # IMAP connection can only process one directory at a time.
+        self.connect = ip_connect
+        self.workers = workers if ip_connect is not None else 1
+        self.executor = None
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+        self.store = ip_store if ip_store is not None else PickleDataset()
+
+        # the progress of an interrupted download
+        self.checkpoint = Checkpoint(checkpoint_path, checkpoint_seconds)
+        self.checkpoint.load()
+
+        if isinstance(self.store, SqliteStore):
+            # the database inserts the mails in bulk and knows the maximum
+            # Index itself
+            self.metadata = self.store
+            self.record_writer = self.store
+        else:
+            # buffers the rows of the panda dataset and keeps its metadata up
+            # to date
+            self.metadata = DatasetMetadata(self.dataset_path, metadata_path)
+            self.record_writer = RecordWriter(self.dataset_path, self.columns,
+                                              write_buffer_rows,
+                                              write_buffer_seconds,
+                                              self.metadata)
+
+    def parse_server(self, sync, resume=False):
+        """
+        The function starts from the root directories of the IMAP server.
+        For every directory it checks whether there any mails to download.
+        It also checks whether there are children directories of the current 
+        selected directory.
+
+        Knowledge arguments:
+        sync: a flag to decide whether the request is for the first time or to 
+        synchronize with the server
+        resume: continue an interrupted first download with the stored tree
+                graph
+        """
+
+        try:
+            self.sync = sync
+
+            self.svr.select("inbox", readonly=False)
+
+            # If the call is not for synchronization, then fetch details from
+            # the server and add children to the root node.
+            if not self.sync:
+                if resume:
+                    # The directories and mails stored by the interrupted
+                    # download are kept, the download continues after the
+                    # last stored mail of every directory.
+                    print("Resuming the interrupted download.")
+                    self.load_tree()
+                else:
+                    self.checkpoint.complete = False
+                    self.checkpoint.failed = dict()
+
+                # lists all the directories present on the server, the
+                # hierarchy of the directories is built from this single
+                # response
+                test, directories = self.svr.list('""', "*")
+                self.build_folder_tree(directories)
+
+                # To recursively parse through the server we only need
+                # directories directly under '/'.
+                # e.g INBOX, Sent, Deleted Items are directories immediately
+                # under '/' but INBOX/ISYProject
+                # e.g. Folder1/Subdirectory/, we only need to store Folder1
+                # for recursive parsing.
+                self.root_directories = list(self.folder_tree[None])
+
+                # If you do not want to process any particular directory for any
+                # reason, then remove them from the root_directories list.
+                # self.root_directories.remove('Calendar')
+
+                # The approach is to start from the root node directories and
+                # process one level of directory at a time.
+                # Starting from the root nodes, we will first create nodes for
+                # root directories. e.g. INBOX, Sent, etc.
+                # For every directory in the 'root_directories', add a new node
+                # and set 'root' as its parent.
+                # adds the new nodes to the H2 tree graph
+                directories = [self.get_directory(self.root, directory)
+                               for directory in self.root_directories]
+
+                # The tree graph is saved before the first mail, so that the
+                # panda dataset is never left without it.
+                self.save_checkpoint(True)
+
+                # Root directories have a level of 1.
+                # Once root directories have been added to the graph as nodes,
+                # process their sub-directories.
+                # e.g. once /Folder1 has been added at level 1, then add
+                # /Folder1/ChildFolder1
+                if directories:
+                    self.start_workers()
+                    try:
+                        self.parse_child_nodes(directories)
+                    except BaseException:
+                        # e.g. interrupted, the downloads still running are
+                        # stopped as well
+                        self.stop_workers(False)
+                        raise
+                    self.stop_workers()
+
+                # all directories have been visited
+                self.checkpoint.complete = True
+
+            else:
+                # else if the call is for synchronization, then load the pickle
+                # dataset first.
+                # Then for every new mail on the server, add a new node to the
+                # H2 tree.
+
+                # list containing all the directories on the IMAP server
+                directories = self.load_tree()
+
+                # check all the directories for recent changes
+                for node in directories:
+                    # directories which cannot be selected have no status
+                    if node.noSelect:
+                        print("The directory " + node.name + " cannot "
+                              "contain emails.")
+                        continue
+
+                    # A STATUS command tells the UIDVALIDITY and the UID the
+                    # next mail will get. If both are unchanged since the last
+                    # call, no mail has been added to the directory.
+                    try:
+                        uid_validity, uid_next = self.get_mailbox_status(node)
+                    except (imaplib.IMAP4.abort, OSError):
+                        # the connection is broken, no directory can be
+                        # synced any more
+                        raise
+                    except Exception as ex:
+                        # e.g. the directory has been deleted on the server,
+                        # the other directories are synced anyway
+                        print("The status of " + node.name + " could not be "
+                              "read, it is not synced.")
+                        print(ex)
+                        continue
+
+                    # Pickle datasets of older versions do not hold the UID
+                    # state of the directories.
+                    if node.uidValidity is None or node.uidNext is None:
+                        print("No UID state stored for " + node.name +
+                              ", comparing the timestamps instead.")
+                        self.sync_by_timestamp(node, uid_validity, uid_next)
+
+                    elif node.uidValidity != uid_validity:
+                        # The UIDs of the directory have been reassigned by
+                        # the server, the stored UIDNEXT and the UIDs of the
+                        # skipped mails are meaningless.
+                        print("The UIDVALIDITY of " + node.name + " has "
+                              "changed, comparing the timestamps instead.")
+                        self.checkpoint.failed.pop(node.name, None)
+                        self.sync_by_timestamp(node, uid_validity, uid_next)
+
+                    elif uid_next > node.uidNext:
+                        print("New mails found in " + node.name +
+                              " since last login.")
+                        self.check_emails_for_sync(node)
+
+                    elif node.name in self.checkpoint.failed:
+                        print("Downloading the skipped mails of " +
+                              node.name + " again.")
+                        self.check_emails_for_sync(node)
+
+                    else:
+                        print("There are no new mails in " + node.name +
+                              " to be synced.")
+                return
+        except Exception as ex:
+            print("The following error happened in parse_server: \n")
+            print(ex)
+
+            # the caller saves the mails stored so far and reports the failure
+            raise
+        finally:
+            # write the rows still buffered, also if an error occurred
+            try:
+                self.record_writer.flush()
+            except Exception as ex:
+                print("The panda dataset could not be written: \n")
+                print(ex)
+
+            print("{0:.2f} kilobytes of mails downloaded from the IMAP server "
+                  "in {1} mode.".format(self.bytes_transferred / 1024,
+                                        self.fetch_mode))
+
+    def load_tree(self):
+        """
+        Loads the stored tree graph, the new mails are added to it
+
+        :return: list of the stored directories
+        """
+
+        # load the data from the pickle dataset
+        content = self.store.get_pickle_dataset()
+
+        # The mails written to the panda dataset after the last
+        # checkpoint are not part of the stored tree graph, they are
+        # downloaded again.
+        self.store.recover(content)
+
+        # The Index of the new rows continues after the maximum Index
+        # of the panda dataset.
+        self.metadata.load()
+        self.index = self.metadata.next_index()
+
+        # load the contents of the stored pickle dataset into a list
+        self.pickle_dataframe_list = []
+
+        # list to store the labels of the nodes in the H2 tree graph
+        self.nodeText = []
+
+        # list to hold the rest of directories, e.g.
+        # Folder1/ChildFolder1
+        not_root_directories = []
+
+        for node in content:
+            if self.max_depth < node.depth:
+                # store the maximum depth of the tree.
+                # this value would be used further while rendering the
+                # stored tree in the form of pickle dataset.
+                self.max_depth = node.depth
+
+            # Fetch one node at a time from the pickle dataset and store
+            # it in a dictionary.
+            # This dictionary would further be used to iterate through
+            # the nodes to render the tree saved in memory.
+            self.node_dict[node.name] = node
+
+            self.pickle_dataframe_list.append(node)
+
+            # add the name of the node for the node labels, mails are
+            # labelled by the first 16 characters of their date like
+            # store_mail does
+            self.nodeText.append(node.name[0:16] if node.isMail and node.name
+                                 else node.name)
+
+            # Start from the Root node and then traverse through
+            # sub-directories to put the new mails under the correct
+            # directory
+            if node.name == "Root":
+                self.root = node
+                self.root_directories = node.children
+
+            else:
+                # if the node is not 'Root', then make the node adjacent
+                # with it's parent node
+                self.adjacency_list.append(
+                    (node.parent.number - 1, node.number - 1)
+                )
+
+                # Further, there are some more directories, e.g.
+                # Folder1/ChildFolder1/...,
+                # which are not root directories. These subdirectories
+                # also needed to be checked for any recent changes on
+                # the server during the synchronization call.
+                if not node.isMail and node not in self.root_directories:
+                    not_root_directories.append(node)
+
+            # Get the range of the values to be displayed as the tick
+            # labels on the slider
+            if node.timestamp is not None:
+                self.get_timestamp_range(node.timestamp.year)
+
+        self.imap_tree = ImapTree(self.nodeText,
+                                  self.pickle_dataframe_list,
+                                  self.adjacency_list)
+
+        # list containing all the directories on the IMAP server
+        return self.root_directories + not_root_directories
+
+    def get_directory(self, parent, name):
+        """
+        Gets the node of a directory, it is added to the tree graph unless it
+        has been stored by an interrupted download
+
+        Keyword arguments:
+        parent: the node of the parent directory
+        name: the name of the directory
+
+        :return: the node of the directory
+        """
+
+        node = self.node_dict.get(name)
+        if node is None or node.isMail or node.parent != parent:
+            node, self.max_depth = self.imap_tree.grow(parent, name)
+
+        # The flag is stored with the tree graph, so that the synchronization
+        # skips the directory as well.
+        node.noSelect = name in self.noselect
+        return node
+
+    def save_checkpoint(self, force=False):
+        """
+        Saves the mails stored so far together with the tree graph, which
+        holds the position of the download in every directory. Unless forced,
+        they are only saved once every checkpoint_seconds.
+
+        Keyword arguments:
+        force: save them in any case
+        """
+
+        if not force and not self.checkpoint.is_due():
+            return
+
+        # the rows of the panda dataset are written before the tree graph,
+        # which refers to them
+        self.record_writer.flush()
+        self.store.dump_pickle_dataset(self.pickle_dataframe_list)
+
+        # the worker threads record skipped mails meanwhile
+        with self.lock:
+            self.checkpoint.save()
+
+    def skip_mail(self, folder, uid, ex):
+        """
+        Records a mail which cannot be read, so that the other mails are
+        downloaded anyway
+
+        Keyword arguments:
+        folder: name of the directory of the mail
+        uid: the UID of the mail
+        ex: the exception raised for the mail
+        """
+
+        print("The mail with UID {0} in {1} is skipped: {2}".format(
+            int(uid), folder, ex))
+        with self.lock:
+            self.checkpoint.add_failure(folder, int(uid))
+
+    @staticmethod
+    def parse_mailbox(data):
+        """
+        Custom method to get the name of the directories
+
+        Keyword arguments:
+        data: a line of the LIST response, e.g.
+              (\\HasNoChildren \\Marked) "/" "INBOX/Drafts"
+
+        :return: the flags, the hierarchy separator and the name of the
+                 directory
+        """
+
+        match = ImapParse.list_response.match(data)
+        if match is None:
+            return None, None, None
+
+        flags = match.group("flags").split()
+        separator = ImapParse.unquote_string(match.group("separator"))
+        name = ImapParse.unquote_string(match.group("name"))
+        return flags, separator, name
+
+    @staticmethod
+    def unquote_string(value):
+        """
+        Removes the quotes around a string of an IMAP response
+
+        Keyword arguments:
+        value: quoted string, atom or NIL
+
+        :return: the unquoted string, None for NIL
+        """
+
+        if value.upper() == "NIL":
+            return None
+        if len(value) > 1 and value[0] == '"' and value[-1] == '"':
+            return re.sub(r"\\(.)", r"\1", value[1:-1])
+        return value
+
+    def build_folder_tree(self, directories):
+        """
+        Builds the hierarchy of the directories from the response of a single
+        LIST command, using the hierarchy separator reported by the server
+
+        Keyword arguments:
+        directories: the data returned by the LIST command
+        """
+
+        ignore_directories = ["INBOX/Ignore"]
+
+        mailboxes = []
+        for mbox in directories:
+            if mbox is None:
+                continue
+
+            # names containing special characters are sent as literal
+            if isinstance(mbox, tuple):
+                flags, separator, name = \
+                    self.parse_mailbox(bytes.decode(mbox[0]))
+                name = bytes.decode(mbox[1])
+            else:
+                flags, separator, name = self.parse_mailbox(bytes.decode(mbox))
+
+            if flags is None:
+                continue
+            mailboxes.append((flags, separator, name))
+
+        names = set(name for flags, separator, name in mailboxes)
+
+        # the root directories are stored under the key None
+        self.folder_tree = {None: []}
+        self.noselect = set()
+
+        for flags, separator, name in mailboxes:
+            if name in ignore_directories:
+                continue
+
+            # e.g. INBOX/Sub has the parent INBOX, the parent of INBOX is the
+            # root
+            parent = None
+            if separator and separator in name:
+                parent = name.rsplit(separator, 1)[0]
+
+                # A directory whose parent has not been listed, or has been
+                # ignored, would not be reached while parsing the levels.
+                if parent not in names or parent in ignore_directories:
+                    continue
+
+            self.folder_tree.setdefault(parent, []).append(name)
+
+            # directories which cannot be selected do not contain any mails
+            if "\\NOSELECT" in [flag.upper() for flag in flags]:
+                self.noselect.add(name)
+
+    def get_mailbox_status(self, node):
+        """
+        Gets the UIDVALIDITY and UIDNEXT of a directory without selecting it
+
+        Keyword arguments:
+        node: the directory whose status has to be checked
+
+        :return: the UIDVALIDITY and UIDNEXT of the directory
+        """
+
+        resp, lst = self.svr.status('"' + node.name + '"',
+                                    "(UIDVALIDITY UIDNEXT)")
+        if resp != "OK":
+            raise Exception("Bad response: %s %s" % (resp, lst))
+
+        # response is of the form b'"INBOX" (UIDVALIDITY 1 UIDNEXT 5)'
+        status = b" ".join(i for i in lst if isinstance(i, bytes))
+        uid_validity = re.search(rb"UIDVALIDITY (\d+)", status)
+        uid_next = re.search(rb"UIDNEXT (\d+)", status)
+        return int(uid_validity.group(1)), int(uid_next.group(1))
+
+    def get_selected_uid_state(self, svr=None):
+        """
+        Gets the UIDVALIDITY and UIDNEXT of the directory selected last, which
+        the server reports in response to the SELECT command
+
+        Keyword arguments:
+        svr: the connection to the server, by default the main connection
+
+        :return: the UIDVALIDITY and UIDNEXT of the directory, None if they
+                 have not been reported
+        """
+
+        svr = svr or self.svr
+        state = []
+        for code in ["UIDVALIDITY", "UIDNEXT"]:
+            resp, lst = svr.response(code)
+            state.append(int(lst[-1]) if lst and lst[-1] is not None
+                         else None)
+        return state[0], state[1]
+
+    @staticmethod
+    def update_uid_state(node, uid_validity, uid_next, data):
+        """
+        Stores the UID state of a directory after its mails have been
+        downloaded
+
+        Keyword arguments:
+        node: the directory whose mails have been downloaded
+        uid_validity: the UIDVALIDITY of the directory
+        uid_next: the UIDNEXT of the directory reported by the server
+        data: the UIDs of the mails obtained from the IMAP server
+        """
+
+        uids = [int(uid) for uid in data[0].split()] if data and data[0] \
+            else []
+
+        # A mail may arrive between SELECT and SEARCH, so the UID following
+        # the highest downloaded UID is taken if it is larger.
+        node.uidValidity = uid_validity
+        node.uidNext = max([uid_next or 1] + [uid + 1 for uid in uids])
+
+    def parse_child_nodes(self, parent_nodes):
+        """
+        The function takes a list of nodes at any particular level
+        and then checks for sub-directories.
+        The directories are also checked for mails.
+
+        Keyword arguments:
+        parent_nodes: list of nodes which will be checked for any child 
+                      directories or mails
+        """
+        
+        # a list to hold the children of nodes in list parent_nodes
+        child_nodes = []
+
+        # The directories of a level are downloaded by the worker threads at
+        # the same time. The mails are then added to the tree in the order
+        # of parent_nodes, so that the numbering of the nodes does not depend
+        # on which download finishes first.
+        directories = [node for node in parent_nodes if not node.isMail]
+        if self.executor is not None:
+            streams = [self.submit_directory(node) for node in directories]
+        else:
+            streams = [self.crawl_directory(node) for node in directories]
+
+        for node, stream in zip(directories, streams):
+            uid_validity, uid_next, data = None, None, [b""]
+            stored, complete = True, False
+
+            # Every chunk is stored as soon as it has been downloaded, the
+            # checkpoint of an interrupted download holds the mails up to it.
+            for item, value in stream:
+                if item == "state":
+                    uid_validity, uid_next = value
+
+                    # The position of the download in the directory is only
+                    # valid for the UIDVALIDITY it has been stored with.
+                    if uid_validity is not None and \
+                            node.uidValidity != uid_validity:
+                        node.uidValidity, node.uidNext = uid_validity, None
+                elif item == "mails":
+                    # after an error the mails are not stored any more, the
+                    # position of the download stays at the last stored mail
+                    mails, last_uid = value
+                    stored = stored and self.store_mails(node, mails)
+
+                    # The skipped mails of the chunk are retried from the
+                    # checkpoint, and the mails deleted meanwhile need not
+                    # be downloaded again, so the download continues after
+                    # the chunk.
+                    if stored:
+                        node.uidNext = max(node.uidNext or 1, last_uid + 1)
+                else:
+                    data, complete = value
+
+            if stored and complete:
+                self.update_uid_state(node, uid_validity, uid_next, data)
+
+            # The immediate sub-directories are known from the LIST response,
+            # as we go one level at a time.
+            for _name in self.folder_tree.get(node.name, []):
+                child_nodes.append(self.get_directory(node, _name))
+
+            self.save_checkpoint()
+
+        # Once all the immediate sub-directories have been added, we now need
+        # to process them.
+        if child_nodes:
+            self.parse_child_nodes(child_nodes)
+        return
+
+    def submit_directory(self, node):
+        """
+        Downloads a directory in a worker thread
+
+        Keyword arguments:
+        node: the directory whose mails are downloaded
+
+        :return: iterator over the items of crawl_directory, they are received
+                 while the download is running
+        """
+
+        items = queue.Queue()
+
+        def crawl():
+            try:
+                for item in self.crawl_directory(node):
+                    items.put(item)
+            finally:
+                items.put(None)
+
+        self.executor.submit(crawl)
+        return iter(items.get, None)
+
+    def start_workers(self):
+        """
+        Starts the worker threads which download the directories
+        """
+
+        if self.workers > 1:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+
+    def stop_workers(self, logout=True):
+        """
+        Stops the worker threads and closes their connections to the server
+
+        Keyword arguments:
+        logout: log out of the connections, else they are closed at once, as
+                the worker threads may still be using them
+        """
+
+        if self.executor is not None:
+            # the directories which have not been started are cancelled
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+        with self.lock:
+            connections = self.connections
+            self.connections = []
+        self.local = threading.local()
+
+        # A running download fails once its connection has been closed.
+        for svr in connections:
+            try:
+                if logout:
+                    svr.logout()
+                else:
+                    svr.shutdown()
+            except Exception as ex:
+                print(ex)
+
+    def get_connection(self):
+        """
+        Gets the connection to the server of the current worker thread
+
+        :return: IMAP server object
+        """
+
+        if self.executor is None:
+            return self.svr
+
+        svr = getattr(self.local, "svr", None)
+        if svr is None:
+            svr = self.connect()
+            self.local.svr = svr
+            with self.lock:
+                self.connections.append(svr)
+        return svr
+
+    def drop_connection(self):
+        """
+        Closes the connection of the current worker thread after it broke,
+        the next call of get_connection opens a new one
+        """
+
+        svr = getattr(self.local, "svr", None)
+        if svr is None:
+            return
+
+        self.local.svr = None
+        with self.lock:
+            # stop_workers may have closed the connections already
+            if svr in self.connections:
+                self.connections.remove(svr)
+
+        try:
+            svr.shutdown()
+        except Exception as ex:
+            print(ex)
+
+    def get_latest_timestamp(self, node):
+        """
+        Method to get the latest timestamp of a subdirectory during 
+        synchronization call
+
+        Keyword arguments:
+        node: the directory whose timestamp on server has to be checked
+
+        :return: the date of the email
+        """
+
+        print("Getting the latest timestamp of directory " + node.name + ".")
+
+        num = self.svr.select('"' + node.name + '"', readonly=False)
+
+        # During synchronization, mails could not be sorted in descending order.
+        # Fetching the list of mail comes in ascending form.
+        # The most recent mail at the end of the list, and the most old at the
+        # top of the list.
+        # Only the Date header or the INTERNALDATE of the mail is needed.
+        if num[1][0] != b"0" and self.timestamp_source == "internaldate":
+            resp, lst = self.svr.fetch(num[1][0].decode("utf-8"),
+                                       "(UID INTERNALDATE)")
+
+            if resp == "OK":
+                for items in FetchResponse.parse(lst).values():
+                    if items.get("INTERNALDATE"):
+                        return items["INTERNALDATE"]
+
+        # the Date header is also read if the INTERNALDATE is missing
+        if num[1][0] != b"0":
+            resp, lst = self.svr.fetch(num[1][0].decode("utf-8"),
+                                       "(BODY.PEEK[HEADER.FIELDS (DATE)])")
+
+            if resp == "OK" and isinstance(lst[0], tuple):
+                email_message = email.message_from_bytes(lst[0][1])
+                return email_message["Date"]
+
+        # if the subdirectory is empty and has no mails return a definite
+        # string
+        return "No mail exists"
+
+    def sync_by_timestamp(self, node, uid_validity, uid_next):
+        """
+        Synchronizes a directory by comparing the timestamp of its latest mail
+        with the stored timestamp. This is only needed if no valid UID state is
+        stored for the directory.
+
+        Keyword arguments:
+        node: the directory which needs to be synced
+        uid_validity: the UIDVALIDITY of the directory reported by STATUS
+        uid_next: the UIDNEXT of the directory reported by STATUS
+        """
+
+        # date is of pattern Sun, 07 Jan 2018 22:14:19 +0100
+
+        # get the latest timestamp of the directory
+        date = self.get_latest_timestamp(node)
+
+        if date == "No mail exists":
+            print("No mails in the directory " + node.name + ".")
+            node.uidValidity, node.uidNext = uid_validity, uid_next
+            return
+        else:
+            print("The timestamp of " + node.name + " is " + str(date) + ".")
+
+        # convert the date string to datetime format
+        date = self.date_parser.parse(date)
+
+        # If the timestamp is bigger than the one stored in the pickle, it
+        # implies new mail has arrived in the directory.
+        if node.timestamp is None or date is None or date > node.timestamp:
+            print("New mails found in " + node.name + " since last login.")
+            self.check_emails_since(node)
+        else:
+            print("There are no new mails in " + node.name + " to be synced.")
+            node.uidValidity, node.uidNext = uid_validity, uid_next
+
+    def check_emails_since(self, node):
+        """
+        During synchronization without a valid UID state, download the mail
+        details of a directory since the timestamp stored for it
+
+        Keyword arguments:
+        node: the directory which needs to be synced
+        """
+
+        print('Syncing the directory ' + node.name + '.')
+        self.svr.select('"' + node.name + '"', readonly=False)
+        uid_validity, uid_next = self.get_selected_uid_state()
+
+        # the position of the download is counted from the start, as there is
+        # no valid UID state
+        node.uidValidity, node.uidNext = uid_validity, None
+
+        if node.timestamp is None:
+            rv, data = self.svr.uid("SEARCH", None, "ALL")
+        else:
+            # To search the mail from a particular directory from a particular
+            # date, we need the date to be of form DD-MMM-YYYY
+            # (e.g. 10-May-2018).
+            # The timestamps are in UTC, the server compares the dates in its
+            # own time zone, so the search starts a day earlier. The mails
+            # stored already are skipped by their timestamp.
+            since = node.timestamp - datetime.timedelta(days=1)
+            timestamp = None
+            for key in self.month_dict.keys():
+                if since.month == int(self.month_dict[key]):
+                    timestamp = str(since.day) + '-' + key + '-' + \
+                                str(since.year)
+                    break
+
+            # get the UIDs of the mails from a directory since a particular
+            # date, the most recent would be at the bottom
+            rv, data = self.svr.uid("SEARCH", None, "SINCE", timestamp, "ALL")
+
+        if self.get_mail(node, data, True):
+            self.update_uid_state(node, uid_validity, uid_next, data)
+
+    def check_emails_for_sync(self, node):
+        """
+        During synchronization, if any directory has new mails, then download
+        the mail details of the mails with a UID above the stored UIDNEXT
+
+        Keyword arguments:
+        node: the directory which needs to be synced
+        """
+
+        print('Syncing the directory ' + node.name + '.')
+        self.svr.select('"' + node.name + '"', readonly=False)
+        uid_validity, uid_next = self.get_selected_uid_state()
+
+        data = self.search_new_uids(self.svr, node)
+
+        if self.get_mail(node, data):
+            self.update_uid_state(node, uid_validity or node.uidValidity,
+                                  uid_next, data)
+
+    def search_new_uids(self, svr, node):
+        """
+        Searches the mails of the selected directory from its UIDNEXT on, and
+        the mails which have been skipped by an earlier download, so that they
+        are downloaded again
+
+        Keyword arguments:
+        svr: the connection to the server with the directory selected
+        node: the directory
+
+        :return: the UIDs in the form of the response to the SEARCH command
+        """
+
+        with self.lock:
+            failed = set(self.checkpoint.failed.get(node.name, []))
+
+        # The range 'n:*' always contains the highest UID of the directory,
+        # even if it is lower than n, hence the UIDs are filtered again.
+        lowest = min([node.uidNext] + list(failed))
+        rv, data = svr.uid("SEARCH", None, "UID", str(lowest) + ":*")
+        found = data[0].split() if data and data[0] else []
+        uids = [uid for uid in found
+                if int(uid) >= node.uidNext or int(uid) in failed]
+
+        # the skipped mails deleted on the server meanwhile are not retried
+        with self.lock:
+            for uid in failed.difference(int(uid) for uid in found):
+                self.checkpoint.remove_failure(node.name, uid)
+        return [b" ".join(uids)]
+
+    def crawl_directory(self, node):
+        """
+        The method downloads the emails under a particular directory. It runs
+        in the worker threads and does not modify the tree graph.
+
+        Keyword arguments:
+        node: directory in the form of node structure under which mails need to
+              be checked
+
+        :return: yields ("state", (UIDVALIDITY, UIDNEXT)) once the directory
+                 is selected, ("mails", (mails, UID)) for every downloaded
+                 chunk with the last UID requested, and finally
+                 ("done", (UIDs, complete)) with the UIDs of the directory and
+                 whether all mails have been downloaded
+        """
+
+        if node.noSelect:
+            print(" The directory " + node.name + " cannot contain emails.")
+            yield "done", ([b""], True)
+            return
+
+        print(" Checking and downloading emails from the directory " +
+              node.name + ".")
+
+        data = [b""]
+        complete = True
+        try:
+            svr = self.get_connection()
+
+            # While reading any directory, 'readonly' flag has been set False
+            # so that the UNSEEN status of mails do get changed.
+            # If the status does not get changed the same mail would be
+            # fetched again during the synchronization call
+            svr.select('"' + node.name + '"', readonly=False)
+            uid_validity, uid_next = self.get_selected_uid_state(svr)
+            yield "state", (uid_validity, uid_next)
+
+            # An interrupted download continues after the last stored mail,
+            # unless the server has reassigned the UIDs since.
+            if node.uidNext is not None and node.uidValidity == uid_validity:
+                data = self.search_new_uids(svr, node)
+            else:
+                # all mails are downloaded again, the skipped ones are
+                # recorded again
+                with self.lock:
+                    self.checkpoint.failed.pop(node.name, None)
+                rv, data = svr.uid("SEARCH", None, "ALL")
+
+            # The mails are downloaded in the order of their UIDs, so that
+            # the position of the download is the UID of the last stored mail.
+            uids = sorted(data[0].split(), key=int) if data and data[0] \
+                else []
+
+            # The mails of every round trip are passed on at once.
+            size = self.get_fetch_round(svr)
+            for start in range(0, len(uids), size):
+                chunk = uids[start:start + size]
+                yield "mails", (list(self.download_mails(
+                    svr, chunk, node.name)), int(chunk[-1]))
+        except Exception as ex:
+            print("An exception occurred while downloading the mails of " +
+                  node.name + ".")
+            print(ex)
+            complete = False
+
+            # After an abort or a socket error the connection cannot be used
+            # any more, the next directory of the worker opens a new one.
+            if isinstance(ex, (imaplib.IMAP4.abort, OSError)):
+                self.drop_connection()
+
+        yield "done", (data, complete)
+
+    def get_mail(self, node, data, by_date=False):
+        """
+        Downloads the mail present under a given directory on the IMAP server
+
+        Keyword arguments:
+        node: directory from which mails should be downloaded
+        data: the UIDs of the mails obtained from the IMAP server
+        by_date: skip the mails that are not more recent than the timestamp of
+                 the directory
+
+        :return: True if all mails have been downloaded, else False
+        """
+
+        uids = sorted(data[0].split(), key=int) if data and data[0] else []
+        return self.store_mails(
+            node, self.download_mails(self.svr, uids, node.name), by_date)
+
+    def store_mails(self, node, mails, by_date=False):
+        """
+        Adds the downloaded mails of a directory to the tree graph and to the
+        panda dataset. A mail which cannot be read is skipped.
+
+        Keyword arguments:
+        node: directory from which mails have been downloaded
+        mails: the mails as returned by download_mails, in the order of their
+               UIDs
+        by_date: skip the mails that are not more recent than the timestamp of
+                 the directory
+
+        :return: True if all mails have been stored, else False
+        """
+
+        try:
+            for mail in mails:
+                self.store_mail(node, mail, by_date)
+
+                # The UIDNEXT of the directory follows the last stored mail,
+                # an interrupted download continues from there.
+                node.uidNext = max(node.uidNext or 1, int(mail["UID"]) + 1)
+                self.save_checkpoint()
+        except Exception as ex:
+            print("An exception occurred in store_mails.")
+            print(ex)
+            return False
+        return True
+
+    def store_mail(self, node, mail, by_date=False):
+        """
+        Adds a downloaded mail to the tree graph and to the panda dataset
+
+        Keyword arguments:
+        node: directory from which the mail has been downloaded
+        mail: the mail as returned by download_mails
+        by_date: skip the mail if it is not more recent than the timestamp of
+                 the directory
+        """
+
+        try:
+            # the timestamp of the mail in UTC, None if neither its Date
+            # header nor its INTERNALDATE can be read
+            timestamp = self.get_timestamp(mail)
+
+            # the name of the node, a mail without a Date header is named by
+            # its INTERNALDATE
+            date = mail["Date"] or mail["Internal_Date"] or ""
+            mail_size = float(mail["Mail_Size"])
+        except Exception as ex:
+            self.skip_mail(node.name, mail["UID"], ex)
+            return
+
+        if by_date and node.timestamp is not None and \
+                timestamp is not None and timestamp <= node.timestamp:
+            return
+
+        # for every mail downloaded add a new node to the tree graph
+        child, self.max_depth = \
+            self.imap_tree.grow(node, date, True, self.sync)
+
+        child.mailSize = mail_size
+
+        # the Index of the row of the mail in the panda dataset
+        child.mailID = self.index
+
+        # set the timestamp of the child node
+        child.timestamp = timestamp
+
+        # fields to be downloaded from the email, they are written to
+        # the dataset in bulk
+        try:
+            self.record_writer.write(
+                [self.index, mail["Subject"], mail["From"], mail["To"],
+                 mail["Date"], mail["Attachment"], node.name,
+                 mail["Mail_Size"]], child, mail["UID"])
+        except ValueError as ex:
+            # the mail is taken out of the tree graph again
+            self.imap_tree.shrink(child)
+            self.skip_mail(node.name, mail["UID"], ex)
+            return
+
+        # for mails set the node label as the date when the mail was
+        # received
+        self.nodeText.append(date[0:16])
+
+        self.index = self.index + 1  # index for the panda dataframe
+
+        # a mail skipped by an earlier download has been stored now
+        with self.lock:
+            self.checkpoint.remove_failure(node.name, int(mail["UID"]))
+
+        # The timestamp of the directory is the one of its most recent
+        # mail. The order in which the mails are downloaded does not
+        # matter this way.
+        if timestamp is not None:
+            if node.timestamp is None or timestamp > node.timestamp:
+                node.timestamp = timestamp
+
+            self.get_timestamp_range(timestamp.year)
+
+    def get_timestamp(self, mail):
+        """
+        Converts the date of a mail from the source chosen by timestamp_source
+        into a timestamp, the other source is used if the date is missing or
+        cannot be read
+
+        Keyword arguments:
+        mail: the mail as returned by download_mails
+
+        :return: the timestamp in UTC as datetime, None if neither date can be
+                 read
+        """
+
+        dates = [mail["Date"], mail["Internal_Date"]]
+        if self.timestamp_source == "internaldate":
+            dates.reverse()
+
+        for date in dates:
+            timestamp = self.date_parser.parse(date)
+            if timestamp is not None:
+                return timestamp
+        return None
+
+    def download_mails(self, svr, uids, folder=None):
+        """
+        Downloads the mails and extracts the fields stored in the panda dataset
+
+        Keyword arguments:
+        svr: the connection to the server with the directory selected
+        uids: list of the UIDs of the mails to be downloaded
+        folder: name of the directory, a mail which cannot be read is recorded
+                as skipped in it
+
+        :return: yields a dictionary with the fields of every mail
+        """
+
+        for uid, items in self.fetch_mails(svr, uids):
+            try:
+                # converting the size of the mail in bytes to kilobytes
+                mail_size = "{0:.2f}".format(
+                    float(items["RFC822.SIZE"]) / 1024)
+
+                # In the 'headers' mode the message consists of the header
+                # fields only.
+                if self.fetch_mode == "headers":
+                    body = FetchResponse.get_item(items, "BODY[HEADER")
+                else:
+                    body = items["RFC822"]
+                email_message = email.message_from_bytes(body)
+
+                # if the email has any attachment, then get the name
+                if self.fetch_mode == "headers":
+                    attachment_name = self.get_attachment_from_structure(
+                        items["BODYSTRUCTURE"])
+                else:
+                    attachment_name = self.get_attachment(email_message)
+
+                mail = {"UID": uid, "Subject": email_message["Subject"],
+                        "From": email_message["From"],
+                        "To": email_message["To"],
+                        "Date": email_message["Date"],
+                        "Internal_Date": items.get("INTERNALDATE"),
+                        "Attachment": attachment_name, "Mail_Size": mail_size}
+            except Exception as ex:
+                self.skip_mail(folder, uid, ex)
+                continue
+
+            yield mail
+
+    def get_fetch_round(self, svr):
+        """
+        Gets the number of mails requested before waiting for the responses
+
+        Keyword arguments:
+        svr: the connection to the server
+
+        :return: the number of mails
+        """
+
+        # The asyncio backend sends the FETCH commands of several chunks before
+        # waiting for their responses.
+        if hasattr(svr, "uid_pipeline"):
+            return self.fetch_chunk_size * pipeline_depth
+        return self.fetch_chunk_size
+
+    def fetch_mails(self, svr, uids):
+        """
+        Downloads the mails in chunks, so that a single UID FETCH command
+        requests the size and the content of many mails at once
+
+        Keyword arguments:
+        svr: the connection to the server with the directory selected
+        uids: list of the UIDs of the mails to be downloaded
+
+        :return: yields the UID and the data items of every mail in the order
+                 of the given UIDs
+        """
+
+        if self.fetch_mode == "headers":
+            # BODY.PEEK does not set the \Seen flag of the mail
+            data_items = "(UID RFC822.SIZE INTERNALDATE BODY.PEEK[" \
+                         "HEADER.FIELDS (" + " ".join(header_fields) + \
+                         ")] BODYSTRUCTURE)"
+        else:
+            data_items = "(UID RFC822.SIZE INTERNALDATE RFC822)"
+
+        pipeline = getattr(svr, "uid_pipeline", None)
+        size = self.fetch_chunk_size
+        step = self.get_fetch_round(svr)
+
+        for start in range(0, len(uids), step):
+            chunk = uids[start:start + step]
+            uid_sets = [b",".join(chunk[i:i + size]).decode("utf-8")
+                        for i in range(0, len(chunk), size)]
+
+            if pipeline is not None:
+                resp, lst = pipeline("FETCH", uid_sets, data_items)
+            else:
+                resp, lst = svr.uid("FETCH", uid_sets[0], data_items)
+
+            # Check if the response to fetch command was successful or not,
+            # if not raise exception and abort
+            if resp != "OK":
+                raise Exception("Bad response: %s %s" % (resp, lst))
+
+            with self.lock:
+                self.bytes_transferred = \
+                    self.bytes_transferred + FetchResponse.size(lst)
+
+            # The server may answer in any order, so the mails are looked up
+            # by their UID to keep the requested order.
+            messages = FetchResponse.parse(lst)
+
+            for uid in chunk:
+                items = messages.get(int(uid))
+
+                # the mail could have been deleted in the meantime
+                if items is None:
+                    print("The mail with UID " + uid.decode("utf-8") +
+                          " could not be fetched.")
+                    continue
+
+                yield uid, items
+
+    @staticmethod
+    def get_attachment(email_message):
+        """
+        Downloads the attachment names in an email, if any
+
+        Keyword arguments:
+        email_message: email obtained from the IMAP server
+
+        :return: list of the attachments in an email
+        """
+
+        attachments = []  # an empty list to contain the name of attachments
+
+        for part in email_message.walk():
+            if part.get_content_maintype() == "multipart":
+                continue
+            if part.get("Content-Disposition") is None:
+                continue
+
+            filename = part.get_filename()  # get the name of the attachment
+            if filename is not None:
+                # append the name of the attachment to the list
+                attachments.append(filename)
+
+        if not attachments:
+            return "No attachment"  # default message if there is no attachment
+        else:
+            return attachments
+
+    @staticmethod
+    def get_attachment_from_structure(structure):
+        """
+        Gets the attachment names in an email from its BODYSTRUCTURE, in the
+        same order as get_attachment would find them
+
+        Keyword arguments:
+        structure: the parsed BODYSTRUCTURE of the email
+
+        :return: list of the attachments in an email
+        """
+
+        attachments = []  # an empty list to contain the name of attachments
+        parts = [structure]
+
+        while parts:
+            part = parts.pop(0)
+            if not isinstance(part, list) or not part:
+                continue
+
+            # A multipart body starts with its sub parts, followed by the
+            # subtype and the extension data.
+            if isinstance(part[0], list):
+                sub_parts = []
+                for sub_part in part:
+                    if not isinstance(sub_part, list):
+                        break
+                    sub_parts.append(sub_part)
+                parts[0:0] = sub_parts
+                continue
+
+            # The extension data of a single part starts after the basic
+            # fields, text parts carry the number of lines and attached
+            # messages their envelope, body and number of lines additionally.
+            content_type = str(part[0]).upper() + "/" + str(part[1]).upper()
+            if part[0] is not None and str(part[0]).upper() == "TEXT":
+                extension = 8
+            elif content_type == "MESSAGE/RFC822":
+                extension = 10
+                parts.insert(0, part[8])
+            else:
+                extension = 7
+
+            # the disposition follows the MD5 of the body
+            if len(part) <= extension + 1 or \
+                    not isinstance(part[extension + 1], list):
+                continue
+            disposition = part[extension + 1]
+
+            filename = ImapParse.get_structure_param(
+                disposition[1] if len(disposition) > 1 else None, "FILENAME")
+            if filename is None:
+                filename = ImapParse.get_structure_param(part[2], "NAME")
+
+            if filename is not None:
+                # append the name of the attachment to the list
+                attachments.append(filename)
+
+        if not attachments:
+            return "No attachment"  # default message if there is no attachment
+        else:
+            return attachments
+
+    @staticmethod
+    def get_structure_param(params, name):
+        """
+        Gets the value of a parameter of a BODYSTRUCTURE parameter list
+
+        Keyword arguments:
+        params: list of alternating parameter names and values
+        name: name of the parameter
+
+        :return: value of the parameter or None
+        """
+
+        if not isinstance(params, list):
+            return None
+
+        for i in range(0, len(params) - 1, 2):
+            key = str(params[i]).upper()
+            value = params[i + 1]
+            if isinstance(value, bytes):
+                value = value.decode("utf-8", "replace")
+
+            if key == name:
+                return value
+
+            # parameter values encoded according to RFC 2231
+            if key == name + "*" and value is not None:
+                parts = email.utils.decode_rfc2231(value)
+                if len(parts) != 3:
+                    return value
+                charset, language, text = parts
+                try:
+                    return unquote(text, encoding=charset or "us-ascii",
+                                   errors="replace")
+                except LookupError:
+                    return unquote(text, errors="replace")
+
+        return None
+
+    @staticmethod
+    def get_timestamp_range(year):
+        """
+        This method retrieves the maximum and minimum year from the mail boxes.
+        The values retrieved would be used as the tick labels on the slider 
+        widget.
+
+        Knowledge arguments:
+        :param year: the year in which the mail was received
+        """
+
+        # Retrieve the year in which the most recent mail of the mailbox was
+        # received
+        if ImapParse.latestYear is None:
+            ImapParse.latestYear = year
+        else:
+            if ImapParse.latestYear < year:
+                ImapParse.latestYear = year
+
+        # Retrieve the year in which the most oldest mail of the mailbox was
+        # received
+        if ImapParse.oldestYear is None:
+            ImapParse.oldestYear = year
+        else:
+            if ImapParse.oldestYear > year:
+                ImapParse.oldestYear = year
+
+
+class PickleDataset:
+    """
+    A class that contains methods to load and dump the dataset of the nodes.
+    The nodes are stored as the arrays of a TreeStore, pickle datasets of older
+    versions are converted.
+    """
+    @staticmethod
+    def get_pickle_dataset():
+        """
+        Loads the tree dataset from the file system
+
+        :return: list of the nodes read from the local drive
+        """
+        if not os.path.isfile(tree_dataset_path):
+            PickleDataset.convert_pickle_dataset()
+        return TreeStore.load(tree_dataset_path).nodes()
+
+    @staticmethod
+    def dump_pickle_dataset(dpd_pickle_dataframe):
+        """
+        A method to dump the tree dataset
+
+        Keyword arguments:
+        :param dpd_pickle_dataframe: a list containing the nodes of the H2 tree
+                                     graph
+        """
+        tree = dpd_pickle_dataframe[0].tree if dpd_pickle_dataframe else None
+
+        # The list usually holds all nodes of a single tree in the order of
+        # their numbers.
+        if tree is None or len(tree) != len(dpd_pickle_dataframe):
+            tree = TreeStore.from_nodes(dpd_pickle_dataframe)
+        tree.save(tree_dataset_path)
+
+    @staticmethod
+    def convert_pickle_dataset():
+        """
+        Converts the pickle dataset of an older version into the tree dataset
+        """
+        print("Converting " + pickle_dataset_path + " into " +
+              tree_dataset_path + ".")
+        with open(pickle_dataset_path, "rb") as file:
+            content = LegacyUnpickler(file).load()
+        TreeStore.from_nodes(content).save(tree_dataset_path)
+
+    @staticmethod
+    def get_mail_nodes(nodes):
+        """
+        Groups the nodes of the mails by their directory and their date, the
+        rows of the panda dataset of older versions are matched by these
+
+        Keyword arguments:
+        nodes: list of the nodes of the tree graph
+
+        :return: dictionary with (directory, date) as key and the list of the
+                 nodes as value, the nodes created first at the end
+        """
+        mail_nodes = dict()
+        for node in nodes:
+            if node.isMail:
+                mail_nodes.setdefault((node.parent.name, node.name),
+                                      []).append(node)
+        for key in mail_nodes:
+            mail_nodes[key].reverse()
+        return mail_nodes
+
+    @staticmethod
+    def match_mail_node(mail_nodes, row):
+        """
+        Finds the node of a row of the panda dataset. The rows of the panda
+        dataset do not refer to the nodes of the mails. A row belongs to a node
+        with the same directory and date, the nodes are taken in the order they
+        have been created.
+
+        Keyword arguments:
+        mail_nodes: the nodes of the mails, as returned by get_mail_nodes. The
+                    matched node is removed.
+        row: the row as a dictionary
+
+        :return: the node or None
+        """
+        matches = mail_nodes.get((row["Mail_Path"], row["Date"]))
+        return matches.pop() if matches else None
+
+    @staticmethod
+    def get_mail_metadata(nodes):
+        """
+        Reads the sender, the recipient and the attachments of the mails from
+        the panda dataset
+
+        Keyword arguments:
+        nodes: list of the nodes of the tree graph
+
+        :return: list of tuples (number of the node, sender, recipient,
+                 attachment)
+        """
+        # Nodes created by this version know the Index of their row, the
+        # others are matched by their directory and date.
+        numbers = {node.mailID: node.number for node in nodes
+                   if node.isMail and node.mailID > 0}
+        mail_nodes = PickleDataset.get_mail_nodes(
+            [node for node in nodes if node.mailID <= 0])
+
+        # The panda dataset is only created once a mail has been written,
+        # e.g. an account with empty directories has none.
+        metadata = []
+        if not os.path.isfile(dataset_path):
+            return metadata
+
+        with open(dataset_path, encoding="utf-8", errors="replace",
+                  newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+
+            for row in reader:
+                if header is None or len(row) != len(header):
+                    continue
+                row = dict(zip(header, row))
+                try:
+                    number = numbers.get(int(row["Index"]))
+                except ValueError:
+                    continue
+                if number is None:
+                    node = PickleDataset.match_mail_node(mail_nodes, row)
+                    if node is None:
+                        continue
+                    number = node.number
+                metadata.append((number, row["From"], row["To"],
+                                 row["Attachment"]))
+        return metadata
+
+    @staticmethod
+    def exists():
+        """
+        Checks whether the mails have been downloaded before
+
+        :return: True if the panda dataset exists, else False
+        """
+        return os.path.isfile(dataset_path)
+
+    @staticmethod
+    def recover(nodes):
+        """
+        Removes the rows of the panda dataset which have been written after
+        the tree dataset was last saved, i.e. by an interrupted download. The
+        mails are downloaded again.
+
+        Keyword arguments:
+        nodes: the nodes of the stored tree dataset
+        """
+        mail_ids = [node.mailID for node in nodes if node.isMail]
+
+        # The mails of pickle datasets of older versions may have no Index.
+        if mail_ids and max(mail_ids) <= 0:
+            return
+        max_index = max(mail_ids, default=0)
+
+        if not os.path.isfile(dataset_path):
+            return
+
+        removed = 0
+        temp_path = dataset_path + ".tmp"
+        with open(dataset_path, encoding="utf-8", errors="replace",
+                  newline="") as f, \
+                open(temp_path, 'w', encoding="utf-8", newline="") as out:
+            reader = csv.reader(f)
+            writer = csv.writer(out, lineterminator=os.linesep)
+            header = next(reader, None)
+            if header is not None:
+                writer.writerow(header)
+                index_column = header.index("Index")
+
+            for row in reader:
+                try:
+                    keep = int(row[index_column]) <= max_index
+                except (ValueError, IndexError):
+                    keep = True
+                if keep:
+                    writer.writerow(row)
+                else:
+                    removed = removed + 1
+
+        if removed:
+            os.replace(temp_path, dataset_path)
+            print("{0} mails of the interrupted download are downloaded "
+                  "again.".format(removed))
+        else:
+            os.remove(temp_path)
+
+
+class SqliteStore:
+    """
+    Keeps the directories, the mails and the synchronization state in a single
+    SQLite database instead of mails.csv and mails.pkl. The changes are
+    committed whenever the tree graph is dumped, i.e. at every checkpoint of
+    the download, so the database never holds mails missing from the tree
+    graph.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS folders (
+            number INTEGER PRIMARY KEY,
+            parent INTEGER,
+            depth INTEGER,
+            name TEXT UNIQUE,
+            mail_size REAL,
+            timestamp TEXT
+        );
+        CREATE TABLE IF NOT EXISTS sync_state (
+            folder TEXT PRIMARY KEY,
+            uid_validity INTEGER,
+            uid_next INTEGER,
+            no_select INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY,
+            mail_index INTEGER,
+            number INTEGER UNIQUE,
+            parent INTEGER,
+            subject TEXT,
+            sender TEXT,
+            recipient TEXT,
+            date TEXT,
+            attachment TEXT,
+            folder TEXT,
+            mail_size REAL,
+            uid INTEGER,
+            timestamp TEXT
+        );
+        CREATE INDEX IF NOT EXISTS messages_index ON messages (mail_index);
+        CREATE INDEX IF NOT EXISTS messages_folder_uid
+            ON messages (folder, uid);
+        CREATE INDEX IF NOT EXISTS messages_timestamp
+            ON messages (timestamp);
+    """
+
+    insert_message = "INSERT INTO messages (mail_index, number, parent, " \
+                     "subject, sender, recipient, date, attachment, folder, " \
+                     "mail_size, uid, timestamp) " \
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+    def __init__(self, path, max_rows=1000):
+        """
+        Method to set the various properties useful for the class
+
+        Keyword arguments:
+        path: path of the SQLite database, it is created if it does not exist
+        max_rows: number of buffered mails which are inserted at once
+        """
+
+        self.path = path
+        self.max_rows = max_rows
+        self.rows = []  # the mails not inserted yet
+
+        # sqlite3 is only imported when the SQLite store is used
+        import sqlite3
+
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(self.schema)
+
+        # databases of older versions do not flag the directories which
+        # cannot be selected
+        columns = [row[1] for row in self.connection.execute(
+            "PRAGMA table_info(sync_state)")]
+        if "no_select" not in columns:
+            self.connection.execute(
+                "ALTER TABLE sync_state ADD COLUMN no_select INTEGER")
+        self.connection.commit()
+
+    @staticmethod
+    def format_timestamp(timestamp):
+        # The text of the timestamps sorts in chronological order, so that
+        # the index on the timestamps can be used for ranges.
+        return timestamp.isoformat(" ") if timestamp is not None else None
+
+    @staticmethod
+    def parse_timestamp(timestamp):
+        return datetime.datetime.fromisoformat(timestamp) \
+            if timestamp is not None else None
+
+    def exists(self):
+        """
+        Checks whether the mails have been downloaded before
+
+        :return: True if the database contains a tree graph, else False
+        """
+
+        return self.connection.execute(
+            "SELECT 1 FROM folders LIMIT 1").fetchone() is not None
+
+    def write(self, row, node=None, uid=None):
+        """
+        Adds a mail to the database, the mails are inserted in bulk
+
+        Keyword arguments:
+        row: list of values in the order of the columns of the panda dataset
+        node: the node of the mail in the tree graph
+        uid: the UID of the mail on the IMAP server
+
+        :raises ValueError: if a field cannot be stored, see
+                            RecordWriter.check_row
+        """
+
+        # the database stores carriage returns, but no surrogates either
+        RecordWriter.check_row(row, node, uid, False)
+
+        # Headers with raw non-ASCII bytes are email.header.Header objects,
+        # they are stored as text like the csv module writes them.
+        subject, sender, recipient, date = [
+            str(value) if value is not None else None for value in row[1:5]]
+        self.rows.append((
+            row[0], node.number if node is not None else None,
+            node.parent.number if node is not None else None,
+            subject, sender, recipient, date, str(row[5]), row[6],
+            float(row[7]), int(uid) if uid is not None else None,
+            self.format_timestamp(node.timestamp if node is not None
+                                  else None)))
+
+        if len(self.rows) >= self.max_rows:
+            self.flush()
+
+    def flush(self):
+        """
+        Inserts the buffered mails, they are committed with the tree graph
+        """
+
+        if self.rows:
+            self.connection.executemany(self.insert_message, self.rows)
+            self.rows = []
+
+    def load(self):
+        # The maximum Index is read from the index of the messages table, so
+        # there is no metadata to verify.
+        return True
+
+    def next_index(self):
+        """
+        :return: the Index of the next mail
+        """
+
+        self.flush()
+        max_index = self.connection.execute(
+            "SELECT MAX(mail_index) FROM messages").fetchone()[0]
+        return (max_index or 0) + 1
+
+    def get_pickle_dataset(self):
+        """
+        Loads the nodes of the tree graph from the database
+
+        :return: list of the nodes ordered by their number, like the pickle
+                 dataset
+        """
+
+        self.flush()
+
+        rows = self.connection.execute(
+            "SELECT f.number, f.parent, f.depth, f.name, 0, 0, f.mail_size, "
+            "f.timestamp, s.uid_validity, s.uid_next, s.no_select "
+            "FROM folders f LEFT JOIN sync_state s ON s.folder = f.name"
+        ).fetchall()
+        rows.extend(self.connection.execute(
+            "SELECT number, parent, NULL, date, 1, mail_index, mail_size, "
+            "timestamp, NULL, NULL, NULL FROM messages "
+            "WHERE number IS NOT NULL"))
+
+        # The nodes are added in the order of their numbers, a parent always
+        # has a smaller number than its children.
+        rows.sort(key=lambda row: row[0])
+        indices = {row[0]: index for index, row in enumerate(rows)}
+
+        # The number of a node is its position, the mails refer to their
+        # directory and get_mail_metadata to the mails by it.
+        if any(row[0] != index + 1 for index, row in enumerate(rows)):
+            self.renumber(indices)
+
+        tree = TreeStore(max(len(rows), 1))
+        for number, parent, depth, name, is_mail, mail_index, mail_size, \
+                timestamp, uid_validity, uid_next, no_select in rows:
+            parent = indices[parent] if parent is not None else -1
+
+            # the depth of a mail is the one of its directory + 1
+            if is_mail:
+                depth = int(tree.depth[parent]) + 1
+
+            index = tree.add(parent, depth, name, bool(is_mail),
+                             mail_size or 0.0, self.parse_timestamp(timestamp))
+            tree.mail_id[index] = mail_index or 0
+            tree.uid_validity[index] = \
+                uid_validity if uid_validity is not None else -1
+            tree.uid_next[index] = uid_next if uid_next is not None else -1
+            tree.no_select[index] = bool(no_select)
+        return tree.nodes()
+
+    def renumber(self, indices):
+        """
+        Numbers the directories and the mails of the database by their
+        position again, e.g. after the rows of some mails have been lost, so
+        that the numbers stay the ones of the loaded nodes
+
+        Keyword arguments:
+        indices: dictionary with the stored numbers as keys and the positions
+                 of the nodes as values
+        """
+
+        print("The nodes of " + self.path + " are numbered again, " +
+              str(max(indices) - len(indices)) + " numbers are missing.")
+
+        with self.connection:
+            self.connection.execute(
+                "CREATE TEMP TABLE numbers (old INTEGER PRIMARY KEY, "
+                "new INTEGER)")
+            self.connection.executemany(
+                "INSERT INTO numbers VALUES (?, ?)",
+                [(number, index + 1) for number, index in indices.items()])
+
+            # the numbers are negated at first, so that no number is taken
+            # twice while they are changed
+            for table in ("folders", "messages"):
+                self.connection.execute(
+                    "UPDATE " + table + " SET "
+                    "number = -(SELECT new FROM numbers WHERE old = number), "
+                    "parent = (SELECT new FROM numbers WHERE old = parent) "
+                    "WHERE number IS NOT NULL")
+                self.connection.execute(
+                    "UPDATE " + table + " SET number = -number "
+                    "WHERE number < 0")
+            self.connection.execute("DROP TABLE numbers")
+
+    def get_mail_metadata(self, nodes):
+        """
+        Reads the sender, the recipient and the attachments of the mails
+
+        Keyword arguments:
+        nodes: list of the nodes of the tree graph, the mails of the database
+               refer to them by their number
+
+        :return: list of tuples (number of the node, sender, recipient,
+                 attachment)
+        """
+
+        self.flush()
+        return self.connection.execute(
+            "SELECT number, sender, recipient, attachment FROM messages "
+            "WHERE number IS NOT NULL").fetchall()
+
+    def dump_pickle_dataset(self, dpd_pickle_dataframe):
+        """
+        Saves the directories of the tree graph and commits all changes. The
+        mails have been inserted while they were downloaded.
+
+        Keyword arguments:
+        dpd_pickle_dataframe: a list containing the nodes of the H2 tree graph
+        """
+
+        self.flush()
+
+        directories = [node for node in dpd_pickle_dataframe
+                       if not node.isMail]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO folders VALUES (?, ?, ?, ?, ?, ?)",
+                [(node.number,
+                  node.parent.number if node.parent is not None else None,
+                  node.depth, node.name, node.mailSize,
+                  self.format_timestamp(node.timestamp))
+                 for node in directories])
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                [(node.name, node.uidValidity, node.uidNext,
+                  int(node.noSelect))
+                 for node in directories])
+
+    def recover(self, nodes):
+        # the mails inserted after the last checkpoint have not been committed
+        pass
+
+    def import_files(self):
+        """
+        Imports the mails and the tree graph of the 'files' store, i.e. the
+        panda dataset and the pickle dataset
+        """
+
+        if self.exists():
+            print("The database " + self.path + " already contains mails, "
+                  "nothing has been imported.")
+            return
+
+        nodes = PickleDataset.get_pickle_dataset()
+        mail_nodes = PickleDataset.get_mail_nodes(nodes)
+
+        skipped = 0
+        with open(dataset_path, encoding="utf-8", errors="replace",
+                  newline="") as f:
+            reader = csv.reader(f)
+
+            # A file left empty by an interrupted first download has no
+            # header, only the tree graph is imported then.
+            header = next(reader, None) or []
+            if not set(columns).issubset(header):
+                print("The panda dataset " + dataset_path + " has no "
+                      "header, its rows are not imported.")
+                reader = []
+
+            for row in reader:
+                if len(row) != len(header):
+                    skipped = skipped + 1
+                    continue
+                row = dict(zip(header, row))
+                try:
+                    index = int(row["Index"])
+                except ValueError:
+                    skipped = skipped + 1
+                    continue
+
+                node = PickleDataset.match_mail_node(mail_nodes, row)
+                self.rows.append((
+                    index, node.number if node is not None else None,
+                    node.parent.number if node is not None else None,
+                    row["Subject"], row["From"], row["To"], row["Date"],
+                    row["Attachment"], row["Mail_Path"],
+                    float(row["Mail_Size"] or 0), None,
+                    self.format_timestamp(node.timestamp
+                                          if node is not None else None)))
+
+        # nodes of mails missing in the panda dataset
+        for matches in mail_nodes.values():
+            for node in matches:
+                self.rows.append((
+                    None, node.number, node.parent.number, None, None, None,
+                    node.name, None, node.parent.name, node.mailSize, None,
+                    self.format_timestamp(node.timestamp)))
+
+        self.dump_pickle_dataset(nodes)
+        print("{0} mails and {1} directories imported, {2} rows of the panda "
+              "dataset skipped.".format(
+                sum(1 for node in nodes if node.isMail),
+                sum(1 for node in nodes if not node.isMail), skipped))
+
+
+class ImapTree:
+    def __init__(self, it_nodetext, it_pickle_dataframe_list, 
+                 it_adjacency_list):
+        """
+        Method to initialize properties for the class
+
+        Keyword arguments:
+        it_nodetext: a list containing the label of the nodes
+        it_pickle_dataframe_list: a list containing node objects from the H2 
+                                  tree graph
+        it_adjacency_list: a list defining the adjacency of nodes in the H2 
+                           tree graph
+        """
+        self.nodeText = it_nodetext
+        self.pickle_dataframe_list = it_pickle_dataframe_list
+        self.adjacency_list = it_adjacency_list
+        self.max_depth = 0
+
+    def grow(self, node, directory, ismailnode=False, sync=False):
+        """
+        Method to add a new node in the H2 tree graph
+
+        Keyword arguments:
+        node: node to which a child needs to be added
+        directory: name of the directory or the label of a mail
+        ismailnode: if the new node being added represents a mail or a 
+                    directory on the IMAP server
+        sync: A flag to check whether the call is for synchronization or not
+        :return: the child node currently added along with the maximum depth of
+                 the tree
+        """
+
+        child = Node(node, node.depth + 1, directory)  # create a child node
+        self.max_depth = child.getmaxdepth()  # get the max depth of the tree
+
+        if ismailnode:
+            # if the node is of mail type then set the property as True
+            child.isMail = ismailnode
+
+        # The number of the child is its position in the tree store, which
+        # holds the same nodes as pickle_dataframe_list. The child is also
+        # added to the children of its parent by the store.
+
+        # setup an adjacent connection between the child and parent node
+        self.adjacency_list.append([node.number - 1, child.number - 1])
+        
+        # add the child node in a list, it would be pickled later
+        self.pickle_dataframe_list.append(child)
+
+        if not child.isMail:
+            # append the name of the node to be shown as the node label
+            self.nodeText.append(directory)
+        return child, self.max_depth
+
+    def shrink(self, child):
+        """
+        Removes the node added last by grow, e.g. a mail which could not be
+        stored
+
+        Keyword arguments:
+        child: the node returned by grow
+        """
+
+        self.adjacency_list.pop()
+        self.pickle_dataframe_list.pop()
+        if not child.isMail:
+            self.nodeText.pop()
+        child.tree.pop()
+
+
+class HyperbolicLayout:
+    """
+    Computes the positions of the nodes of a tree in the Poincare disc. The
+    children of a node are placed on an arc around it, in a frame in which the
+    node is in the center and its parent lies on the negative real axis. All
+    nodes of one depth are placed at once, so the layout needs a constant
+    number of NumPy operations per level of the tree.
+    """
+
+    def __init__(self, rs, phi_0s):
+        """
+        Method to set the various properties useful for the class
+
+        Keyword arguments:
+        rs: the distance of the children from their parent at every depth
+        phi_0s: the angle of the arc of the children at every depth
+        """
+
+        self.rs = np.asarray(rs, dtype=float)
+        self.phi_0s = np.asarray(phi_0s, dtype=float)
+
+    @staticmethod
+    def get_frame_angles(positions, parents):
+        """
+        Gets the rotation of the frames of some nodes, that moves the parent
+        of every node onto the negative real axis
+
+        Keyword arguments:
+        positions: complex positions of the nodes
+        parents: complex positions of their parents
+
+        :return: array of the angles
+        """
+
+        pos_parent = (parents - positions) / (1 - np.conj(positions) * parents)
+        return -np.arctan2(-pos_parent.imag, -pos_parent.real)
+
+    def compute(self, tree, root=0):
+        """
+        Computes the positions of all nodes of a tree
+
+        Keyword arguments:
+        tree: the TreeStore holding the nodes
+        root: the index of the root node, it is placed at the center
+
+        :return: complex array with the position of every node, indexed by the
+                 node index
+        """
+
+        count = len(tree)
+        parent = tree.parent[:count]
+        depth = tree.depth[:count]
+
+        positions = np.zeros(count, dtype=complex)
+        angles = np.zeros(count)  # the rotation of the frame of every node
+
+        # the number of children of every node and the rank of every node
+        # among its siblings
+        tree.get_children(root)
+        offsets = tree.child_offsets
+        number_of_children = np.diff(offsets)
+        rank = np.zeros(count, dtype=np.int64)
+        rank[tree.child_index] = np.arange(count) - \
+            offsets[parent[tree.child_index]]
+
+        for level in reversed(tree.get_levels()):
+            parents = parent[level]
+            parents_depth = depth[parents]
+
+            # the positions of the children in the frames of their parents,
+            # spread evenly over an arc starting at the angle 0
+            children = number_of_children[parents]
+            fraction = np.where(children > 1, rank[level] /
+                                np.maximum(children - 1, 1), 0.0)
+            local = self.rs[parents_depth] * \
+                np.exp(1j * self.phi_0s[parents_depth] * fraction)
+
+            # map the positions from the frames of the parents back
+            c = positions[parents]
+            local = np.exp(-1j * angles[parents]) * local
+            positions[level] = (local + c) / (1 + np.conj(c) * local)
+            angles[level] = self.get_frame_angles(positions[level],
+                                                  positions[parents])
+
+        # The recursive layout focused every node in depth-first order and
+        # finally moved the root back into the center, i.e. the positions end
+        # up rotated into the frame of the last node of the traversal.
+        last = root
+        while number_of_children[last]:
+            last = tree.child_index[offsets[last + 1] - 1]
+        if last != root:
+            positions = self.moebius(positions, positions[last],
+                                       angles[last])
+            positions = self.moebius(positions, positions[root])
+        return positions
+
+    @staticmethod
+    def moebius(z, c=0, phi=0):
+        """
+        Möbius transformation
+        """
+        return exp(1j * phi) * (z - c) / (1 - conjugate(c) * z)
+
+    @staticmethod
+    def focus_point(positions, c, phi=0):
+        """
+        Applies the Möbius transformation moving c into the center to all
+        positions in place
+
+        Keyword arguments:
+        positions: complex array of the positions
+        c: the position moved into the center
+        phi: the angle the positions are rotated by
+        """
+
+        denominator = np.multiply(positions, -np.conj(c))
+        denominator += 1
+        positions -= c
+        positions /= denominator
+        if phi:
+            positions *= exp(1j * phi)
+
+    def save(self, path, tree, positions, root=0):
+        """
+        Saves the positions computed for a tree, so that they do not have to
+        be computed again when the tree is rendered
+
+        Keyword arguments:
+        path: the path of the layout file
+        tree: the TreeStore holding the nodes
+        positions: the positions returned by compute
+        root: the index of the root node
+        """
+
+        np.savez(path, rs=self.rs, phi_0s=self.phi_0s, root=root,
+                 parent=tree.parent[:len(tree)], positions=positions)
+
+    def load(self, path, tree, root=0):
+        """
+        Loads the positions saved for a tree. They are only used if they have
+        been computed with the same parameters for the same tree.
+
+        Keyword arguments:
+        path: the path of the layout file
+        tree: the TreeStore holding the nodes
+        root: the index of the root node
+
+        :return: complex array with the position of every node, None if there
+                 are no matching positions
+        """
+
+        if not os.path.isfile(path):
+            return None
+
+        with np.load(path) as content:
+            if int(content["root"]) != root or \
+                    not np.array_equal(content["rs"], self.rs) or \
+                    not np.array_equal(content["phi_0s"], self.phi_0s) or \
+                    not np.array_equal(content["parent"],
+                                       tree.parent[:len(tree)]):
+                return None
+            return content["positions"]
+
+
+def get_store():
+    """
+    Opens the store of the mails and the tree graph chosen by store_type
+
+    :return: SqliteStore or PickleDataset
+    """
+
+    if store_type == "sqlite":
+        return SqliteStore(database_path, write_buffer_rows)
+    return PickleDataset()
+
+
+def run_maintenance(options):
+    """
+    Runs the maintenance tasks, which do not connect to the IMAP server, given
+    on the command line
+
+    Keyword arguments:
+    options: the namespace returned by parse_args
+
+    :return: True if a task has been run
+    """
+
+    # Verify the metadata of the panda dataset against the CSV file and repair
+    # it.
+    if options.repair_metadata:
+        DatasetMetadata(dataset_path, metadata_path).repair()
+        return True
+
+    # Import the panda dataset and the pickle dataset into the SQLite
+    # database.
+    if options.import_files:
+        SqliteStore(database_path).import_files()
+        return True
+    return False
+
+
+def synchronize(store):
+    """
+    Downloads all mails from the IMAP server on the first run, or the mails
+    added since the last run, and saves the tree graph in the store
+
+    Keyword arguments:
+    store: the store of the mails and the tree graph, see get_store
+
+    :return: the root node of the tree graph and the ImapParse, which holds
+             the nodes, their labels and their adjacency list
+    """
+
+    index = 1  # starting index of the panda dataset
+
+    # Root node would be the default center node in the H2 tree graph.
+    # The graph would originate from root node only.
+
+    # Create a root node for the tree. Call the node by the name 'Root'.
+    root = Node(name="Root")
+
+    # Log in the server to fetch details
+    login = Login(imap_server_name, user)
+
+    # Store the IMAP server object, as it would be required for further IMAP
+    # server operations.
+    svr = login.svr_obj
+
+    # create an object of the class IMAPParse
+    imap_parse = ImapParse(svr, root, index, columns, dataset_path, ["Root"],
+                           month_dict, [root], login.connect, store)
+
+    # Check if the panda dataset exists at the dataset path.
+    # If it exists, then synchronize the IMAP server current state with the data
+    # in the panda dataset, else start downloading all the details from the IMAP
+    # server. An interrupted first download is continued where it stopped.
+    sync = store.exists() and imap_parse.checkpoint.complete
+    resume = store.exists() and not sync
+
+    # In certain cases, when the script connects to the IMAP server an error
+    # occurs, e.g. the connection is lost, or the script is interrupted. The
+    # mails stored until then are saved with the tree graph, so that the next
+    # run continues from there instead of downloading them again.
+    try:
+        imap_parse.parse_server(sync, resume)
+
+    except (Exception, KeyboardInterrupt) as ex:
+        print(ex)
+
+        imap_parse.save_checkpoint(True)
+
+        print("\nThe program terminated abnormally. The mails downloaded so "
+              "far have been saved.\n")
+        print("Please fix any issues and then re-run the script, it "
+              "continues where it stopped.\n")
+        print("Exiting....")
+
+        # e.g. a scheduled job sees the failed synchronization
+        sys.exit(1)
+
+    # the Root node loaded from the pickle dataset, if any
+    root = imap_parse.root
+
+    # The sizes and the numbers of mails of the directories are summed up
+    # before the tree is saved, so that they are stored as well.
+    root.tree.aggregate()
+
+    # Dump all the node information to the store. Based on its content
+    # the size of the nodes and the link widths would be modified.
+    imap_parse.save_checkpoint(True)
+    return root, imap_parse
+
+
+def get_layout_parameters(root):
+    """
+    Gets the parameters of the layout of the H2 tree graph, the arcs of the
+    children get narrower with every level
+
+    Keyword arguments:
+    root: the root node of the tree graph
+
+    :return: the rs and the phi_0s of the HyperbolicLayout
+    """
+
+    rs = ones(max(0, 7)) * .5
+    phi_0s = ones(max(0, 7)) * 2 * pi / 9.0
+    root_angle = 2 * pi / len(root.children)
+    phi_0s[0:7] = [2 * pi, root_angle / 2, root_angle / 3, root_angle / 4,
+                   root_angle / 5, root_angle / 6, root_angle / 7]
+    rs[0:7] = [.3, .5, .4, .5, .3, .3, .3]
+    return rs, phi_0s
+
+
+def build_layout(root):
+    """
+    Computes the layout of the H2 tree graph and saves it, it is loaded when
+    the graph is rendered
+
+    Keyword arguments:
+    root: the root node of the tree graph
+
+    :return: complex array with the position of every node
+    """
+
+    layout = HyperbolicLayout(*get_layout_parameters(root))
+    positions = layout.compute(root.tree, root.index)
+    layout.save(layout_path, root.tree, positions, root.index)
+    return positions
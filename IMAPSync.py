@@ -0,0 +1,111 @@
+"""
+Synchronizes the local datasets with the IMAP server without the graphical
+user interface, e.g. as a scheduled job on a server without a display.
+Neither PyQt5 nor pyqtgraph are imported.
+
+The subcommands are
+sync: downloads the new mails, then computes the layout of the H2 tree graph
+build-layout: computes the layout of the stored tree graph again
+stats: prints the number and the size of the stored mails
+
+The password is read from the environment variable IMAP_PASSWORD if it is set.
+IMAPBrowser.py renders the precomputed layout without computing it again.
+
+Usage: python IMAPSync.py sync --username USER [options of IMAPBrowser.py]
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+import IMAPCore
+
+
+def sync():
+    """
+    Synchronizes the store with the IMAP server and computes the layout of the
+    updated tree graph
+    """
+
+    store = IMAPCore.get_store()
+    root, imap_parse = IMAPCore.synchronize(store)
+    IMAPCore.build_layout(root)
+    print("{0} nodes synchronized, {1:.1f} MB received.".format(
+        len(root.tree), imap_parse.bytes_transferred / 1024 ** 2))
+
+
+def load_tree():
+    """
+    Loads the stored tree graph and sums up the sizes and the numbers of mails
+    of its directories
+
+    :return: the root node of the tree graph
+    """
+
+    store = IMAPCore.get_store()
+    if not store.exists():
+        sys.exit("There is no dataset yet, please run the sync command.")
+
+    root = store.get_pickle_dataset()[0]
+    root.tree.aggregate()
+    return root
+
+
+def build_layout():
+    """
+    Computes the layout of the stored tree graph and saves it
+    """
+
+    root = load_tree()
+    IMAPCore.build_layout(root)
+    print("Layout of {0} nodes saved to {1}.".format(len(root.tree),
+                                                    IMAPCore.layout_path))
+
+
+def stats():
+    """
+    Prints the numbers of the directories and the mails, their size and the
+    date range of the mails, in total and per top-level directory
+    """
+
+    root = load_tree()
+    tree = root.tree
+    rollups = tree.rollups
+
+    is_mail = tree.is_mail[:len(tree)]
+    timestamps = tree.timestamp[:len(tree)][is_mail]
+    timestamps = timestamps[~np.isnat(timestamps)]
+
+    print("Directories: {0}".format(int((~is_mail).sum())))
+    print("Mails:       {0}".format(int(is_mail.sum())))
+    print("Size:        {0:.1f} MB".format(rollups["size"][root.index] /
+                                           1024))
+    if len(timestamps):
+        print("Received:    {0} to {1}".format(timestamps.min(),
+                                               timestamps.max()))
+
+    print("\n{0:<40} {1:>8} {2:>10}  {3}".format("Directory", "Mails", "MB",
+                                                "Latest mail"))
+    for child in root.children:
+        if child.isMail:
+            continue
+        latest = rollups["latest_timestamp"][child.index]
+        print("{0:<40} {1:>8} {2:>10.1f}  {3}".format(
+            child.name, rollups["number_of_mails"][child.index],
+            rollups["size"][child.index] / 1024,
+            latest if not np.isnat(latest) else "-"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(parents=[IMAPCore.parser])
+    parser.add_argument("command", choices=["sync", "build-layout", "stats"])
+    args = parser.parse_args()
+    IMAPCore.configure(args)
+
+    # Verify or import the datasets, without connecting to the IMAP server.
+    if IMAPCore.run_maintenance(args):
+        sys.exit()
+
+    {"sync": sync, "build-layout": build_layout, "stats": stats}[
+        args.command]()
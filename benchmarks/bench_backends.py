@@ -0,0 +1,163 @@
+"""
+Compares the time the imaplib and the asyncio backend of IMAPCore need to
+download the headers of the mails in one directory.
+
+A small IMAP server answering LOGIN, SELECT, UID FETCH and LOGOUT is started
+in the background. It delays every response by a simulated round trip time,
+so the benchmark shows the effect of pipelining the UID FETCH commands.
+
+Usage: python benchmarks/bench_backends.py [--mails N] [--latency SECONDS]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+import imaplib
+
+bench_parser = argparse.ArgumentParser()
+bench_parser.add_argument("--mails", type=int, default=2000)
+bench_parser.add_argument("--latency", type=float, default=0.05)
+bench_parser.add_argument("--chunk-size", type=int, default=100)
+bench_args = bench_parser.parse_args()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import IMAPCore  # noqa: E402
+
+IMAPCore.fetch_chunk_size = max(1, bench_args.chunk_size)
+
+
+def make_header(uid):
+    return (b"Subject: mail %d\r\nFrom: sender%d@example.org\r\n"
+            b"To: receiver@example.org\r\n"
+            b"Date: Sun, 01 Jan 2018 22:14:19 +0100\r\n\r\n" % (uid, uid % 7))
+
+
+class BenchServer:
+    """
+    IMAP server with a single directory holding the given number of mails
+    """
+
+    structure = b'("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "7BIT" 12 1 ' \
+                b'NIL NIL NIL NIL)'
+
+    def __init__(self, mails, latency):
+        self.mails = mails
+        self.latency = latency
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            server = self.loop.run_until_complete(
+                asyncio.start_server(self.handle, "127.0.0.1", 0))
+            self.port = server.sockets[0].getsockname()[1]
+            ready.set()
+            self.loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+
+    async def handle(self, reader, writer):
+        # The responses are written in the order the commands arrived, each one
+        # a round trip time after its command was received.
+        queue = asyncio.Queue()
+
+        async def respond():
+            while True:
+                due, response = await queue.get()
+                if response is None:
+                    writer.close()
+                    return
+                await asyncio.sleep(max(0.0, due - self.loop.time()))
+                writer.write(response)
+                await writer.drain()
+
+        responder = asyncio.ensure_future(respond())
+        writer.write(b"* OK bench server ready\r\n")
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            due = self.loop.time() + self.latency
+            tag, command, args = (line.rstrip(b"\r\n").split(b" ", 2) +
+                                  [b""])[:3]
+            command = command.upper()
+
+            if command == b"CAPABILITY":
+                response = b"* CAPABILITY IMAP4rev1\r\n" + tag + \
+                           b" OK done\r\n"
+            elif command == b"LOGIN":
+                response = tag + b" OK done\r\n"
+            elif command == b"SELECT":
+                response = b"* %d EXISTS\r\n* OK [UIDVALIDITY 1] ok\r\n" \
+                           b"* OK [UIDNEXT %d] ok\r\n%s OK done\r\n" % \
+                           (self.mails, self.mails + 1, tag)
+            elif command == b"UID" and args.upper().startswith(b"FETCH"):
+                response = self.fetch(args.split(b" ")[1]) + tag + \
+                           b" OK done\r\n"
+            elif command == b"LOGOUT":
+                await queue.put((due, b"* BYE\r\n" + tag + b" OK bye\r\n"))
+                break
+            else:
+                response = tag + b" BAD unknown command\r\n"
+            await queue.put((due, response))
+
+        await queue.put((0, None))
+        await responder
+
+    def fetch(self, uid_set):
+        response = []
+        for uid in uid_set.split(b","):
+            uid = int(uid)
+            header = make_header(uid)
+            response.append(
+                b"* %d FETCH (UID %d RFC822.SIZE %d BODY[HEADER.FIELDS "
+                b"(SUBJECT FROM TO DATE)] {%d}\r\n%s BODYSTRUCTURE %s)\r\n" %
+                (uid, uid, len(header) + 14, len(header), header,
+                 self.structure))
+        return b"".join(response)
+
+
+def run_backend(name, connect, mails):
+    svr = connect()
+    svr.login("user", "password")
+    svr.select('"INBOX"')
+
+    parser = IMAPCore.ImapParse(svr, IMAPCore.Node(name="Root"), 1,
+                                IMAPCore.columns, os.devnull, [], {}, [])
+    uids = [str(uid).encode("utf-8") for uid in range(1, mails + 1)]
+
+    start = time.perf_counter()
+    count = sum(1 for _ in parser.download_mails(svr, uids))
+    elapsed = time.perf_counter() - start
+    svr.logout()
+
+    print("%-8s %6d mails  %8.3f s  %10.0f mails/s" %
+          (name, count, elapsed, count / elapsed))
+    return elapsed
+
+
+if __name__ == "__main__":
+    bench_server = BenchServer(bench_args.mails, bench_args.latency)
+    bench_server.start()
+    print("%d mails, chunks of %d, %.0f ms round trip time, pipeline depth %d"
+          % (bench_args.mails, bench_args.chunk_size,
+             bench_args.latency * 1000, IMAPCore.pipeline_depth))
+
+    sync_time = run_backend(
+        "imaplib",
+        lambda: imaplib.IMAP4("127.0.0.1", bench_server.port),
+        bench_args.mails)
+    async_time = run_backend(
+        "asyncio",
+        lambda: IMAPCore.AsyncImapConnection("127.0.0.1",
+                                             bench_server.port, None),
+        bench_args.mails)
+    print("speedup: %.2fx" % (sync_time / async_time))
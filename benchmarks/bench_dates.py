@@ -0,0 +1,158 @@
+"""
+Compares the DateParser of IMAPCore with the conversion of the Date header
+it replaced and with email.utils.
+
+The corpus holds variants of the Date header as they are found in mailboxes,
+each mail with a random date and time, so that nearly all headers are unique
+like in a real mailbox. The variants are weighted, most mails use the form of
+RFC 2822 with a numeric time zone. The results of the DateParser are checked
+against email.utils.parsedate_tz, the script exits with an error if they
+differ. The former conversion fails on some of the variants, the number of its
+failures is printed, and it ignores the time zone.
+
+The uncached runs convert every header once. The cached run converts every
+header three times, as ImapParse did, to show the effect of the cache.
+
+Usage: python benchmarks/bench_dates.py [--mails N] [--seed SEED]
+"""
+
+import argparse
+import datetime
+import email.utils
+import os
+import random
+import sys
+import time
+
+bench_parser = argparse.ArgumentParser()
+bench_parser.add_argument("--mails", type=int, default=100000)
+bench_parser.add_argument("--seed", type=int, default=1)
+bench_args = bench_parser.parse_args()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import IMAPCore  # noqa: E402
+
+# variants of the Date header, filled in with the date of a mail, and their
+# weights
+variants = [
+    ("{weekday}, {day:02d} {month} {year} {hour:02d}:{minute:02d}:"
+     "{second:02d} {zone}", 50),
+    ("{weekday}, {day} {month} {year} {hour:02d}:{minute:02d}:{second:02d}"
+     " {zone}", 15),
+    ("{weekday}, {day:02d} {month} {year} {hour:02d}:{minute:02d}:"
+     "{second:02d} {zone} ({zone_name})", 12),
+    ("{day:02d} {month} {year} {hour:02d}:{minute:02d}:{second:02d} {zone}",
+     5),
+    ("{weekday}, {day:02d} {month} {year} {hour:02d}:{minute:02d}:"
+     "{second:02d} GMT", 5),
+    ("{weekday}, {day:02d} {month} {year} {hour:02d}:{minute:02d}:"
+     "{second:02d} {zone_name}", 3),
+    ("{weekday}, {day} {month} {year} {hour:02d}:{minute:02d} {zone}", 2),
+    ("{weekday}, {day:02d} {month} {short_year:02d} {hour:02d}:{minute:02d}:"
+     "{second:02d} {zone}", 2),
+    ("{weekday},{day:02d} {month} {year} {hour:02d}:{minute:02d}:{second:02d}"
+     " {zone}", 2),
+    ("{weekday}, {day:02d}-{month}-{year} {hour:02d}:{minute:02d}:"
+     "{second:02d} {zone}", 1),
+    ("{weekday}, {day:02d} {month} {year} {hour:02d}:{minute:02d}:"
+     "{second:02d} {zone_hours}:00", 1),
+    ("{weekday}, {day:02d} {month} {year} {hour:02d}:{minute:02d}:"
+     "{second:02d} {zone_hours}", 1),
+    ("{weekday} {month} {day} {hour:02d}:{minute:02d}:{second:02d} {year}",
+     1)]
+
+# the time zones of the senders, e.g. -0500 (EST)
+zones = [("+0000", "UTC"), ("+0100", "CET"), ("+0200", "CEST"),
+         ("-0500", "EST"), ("-0400", "EDT"), ("-0800", "PST"),
+         ("-0700", "PDT"), ("+0530", "IST"), ("+0900", "JST"),
+         ("+1000", "AEST"), ("-0300", "BRT"), ("+0800", "CST")]
+
+weekdays = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+month_names = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep",
+               "Oct", "Nov", "Dec"]
+
+
+def make_corpus(mails, rng):
+    """
+    Creates the Date headers of random mails from 2005 to 2020
+    """
+
+    corpus = []
+    start = datetime.datetime(2005, 1, 1)
+    templates = rng.choices([variant for variant, weight in variants],
+                            [weight for variant, weight in variants], k=mails)
+    for template in templates:
+        date = start + datetime.timedelta(
+            seconds=rng.randrange(15 * 365 * 86400))
+        zone, zone_name = rng.choice(zones)
+        corpus.append(template.format(
+            weekday=weekdays[date.weekday()], day=date.day,
+            month=month_names[date.month - 1], year=date.year,
+            short_year=date.year % 100, hour=date.hour, minute=date.minute,
+            second=date.second, zone=zone, zone_name=zone_name,
+            zone_hours=zone[:3]))
+    return corpus
+
+
+def former_conversion(date):
+    """
+    The conversion of ImapParse.get_converted_timestamp before it was
+    replaced, it ignores the time zone
+    """
+
+    timestamp = date[5:25]
+    for ch in [' ', ':']:
+        timestamp = timestamp.replace(ch, "")
+    if len(timestamp) < 15:
+        timestamp = '0' + timestamp
+    timestamp = timestamp[0:2] + IMAPCore.month_dict[timestamp[2:5]] + \
+        timestamp[5:]
+    return datetime.datetime(
+        int(timestamp[4:8]), int(timestamp[2:4]), int(timestamp[:2]),
+        int(timestamp[8:10]), int(timestamp[10:12]), int(timestamp[12:]))
+
+
+def email_utils_conversion(date):
+    parts = email.utils.parsedate_tz(date)
+    return datetime.datetime(*parts[:5], min(parts[5], 59)) - \
+        datetime.timedelta(seconds=parts[9] or 0)
+
+
+def run(name, convert, corpus, repetitions=1):
+    """
+    Converts every header the given number of times
+
+    :return: the number of headers which could not be converted
+    """
+
+    failures = 0
+    start = time.perf_counter()
+    for date in corpus:
+        for repetition in range(repetitions):
+            try:
+                convert(date)
+            except Exception:
+                failures = failures + 1
+    elapsed = time.perf_counter() - start
+    print("%-22s %8.3f s  %8.2f us/header  %6d failures" %
+          (name, elapsed, elapsed * 1e6 / (repetitions * len(corpus)),
+           failures // repetitions))
+    return failures
+
+
+if __name__ == "__main__":
+    rng = random.Random(bench_args.seed)
+    corpus = make_corpus(bench_args.mails, rng)
+
+    for date in set(corpus):
+        expected = email_utils_conversion(date)
+        if IMAPCore.DateParser().convert(date) != expected:
+            sys.exit("The DateParser converts %r into %s instead of %s." %
+                     (date, IMAPCore.DateParser().convert(date), expected))
+
+    print("%d headers, %d of them distinct, %d variants" %
+          (len(corpus), len(set(corpus)), len(variants)))
+    run("former conversion", former_conversion, corpus)
+    run("email.utils", email_utils_conversion, corpus)
+    run("DateParser uncached", IMAPCore.DateParser().convert, corpus)
+    run("DateParser cached x3", IMAPCore.DateParser().parse, corpus, 3)
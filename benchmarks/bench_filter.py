@@ -0,0 +1,88 @@
+"""
+Times the MailFilter of IMAPCore on a random tree of mails.
+
+The index of the filter is built once, then several combinations of date
+range, sender, recipient, directory, size bucket and attachment are applied.
+Every combination is run twice, the second run uses the cached masks.
+
+Usage: python benchmarks/bench_filter.py [--mails N] [--seed SEED]
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+bench_parser = argparse.ArgumentParser()
+bench_parser.add_argument("--mails", type=int, default=300000)
+bench_parser.add_argument("--seed", type=int, default=1)
+bench_args = bench_parser.parse_args()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import IMAPCore  # noqa: E402
+
+directories = 50
+senders = 2000
+
+
+def make_tree(mails, rng):
+    """
+    Creates a tree of directories holding random mails
+
+    :return: the root node and the metadata of the mails
+    """
+
+    root = IMAPCore.Node(name="Root")
+    folders = [IMAPCore.Node(root, 1, "Folder%d" % i)
+               for i in range(directories)]
+
+    metadata = []
+    start = datetime.datetime(2010, 1, 1)
+    for i in range(mails):
+        node = IMAPCore.Node(rng.choice(folders), 2, "mail")
+        node.isMail = True
+        node.mailSize = rng.expovariate(1 / 50.0)
+        node.timestamp = start + datetime.timedelta(
+            seconds=rng.randrange(10 * 365 * 86400))
+        metadata.append((node.number,
+                         "Sender <sender%d@example.org>" %
+                         rng.randrange(senders),
+                         "me@example.org, other%d@example.org" %
+                         rng.randrange(100),
+                         "['file.pdf']" if rng.random() < 0.2
+                         else "No attachment"))
+    return root, metadata
+
+
+if __name__ == "__main__":
+    rng = random.Random(bench_args.seed)
+    root, metadata = make_tree(bench_args.mails, rng)
+
+    start = time.perf_counter()
+    mail_filter = IMAPCore.MailFilter(root.tree, metadata)
+    print("index of %d mails built in %.3f s" %
+          (bench_args.mails, time.perf_counter() - start))
+
+    combinations = [
+        {"since": datetime.datetime(2015, 1, 1),
+         "before": datetime.datetime(2016, 1, 1)},
+        {"senders": ["sender1@example.org", "sender2@example.org"]},
+        {"folders": ["Folder3"], "attachment": True},
+        {"since": datetime.datetime(2012, 3, 1),
+         "before": datetime.datetime(2018, 7, 1),
+         "senders": ["sender7@example.org"],
+         "recipients": ["other5@example.org"],
+         "folders": ["Folder1", "Folder2"],
+         "size_buckets": [1, 2], "attachment": False}]
+
+    for criteria in combinations:
+        times = []
+        for run in range(2):
+            start = time.perf_counter()
+            mask = mail_filter.filter(**criteria)
+            times.append(time.perf_counter() - start)
+        print("%7d mails  first %7.3f ms  cached %7.3f ms  %s" %
+              (mask.sum(), times[0] * 1000, times[1] * 1000,
+               ", ".join(sorted(criteria))))
@@ -0,0 +1,77 @@
+"""
+Times importing the modules of the headless paths, IMAPCore and IMAPSync,
+against importing them together with the packages the single IMAPBrowser
+module used to import, i.e. pandas, pyqtgraph and PyQt5.
+
+Every import runs in a new interpreter. The best time of several runs is
+printed, without the start-up time of the interpreter itself, along with the
+peak memory of the interpreter. Packages which are not installed are left
+out of the comparison.
+
+Usage: python benchmarks/bench_import.py [--runs N]
+"""
+
+import argparse
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+
+bench_parser = argparse.ArgumentParser()
+bench_parser.add_argument("--runs", type=int, default=10)
+bench_args = bench_parser.parse_args()
+
+package_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the packages IMAPBrowser imported before the headless paths were split off
+former_dependencies = ["pandas", "pyqtgraph", "PyQt5.QtWidgets"]
+
+
+def is_installed(name):
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ImportError:
+        return False
+
+
+def time_import(modules, runs):
+    """
+    Imports the modules in new interpreters
+
+    :return: the best time in seconds and the peak memory in kilobytes
+    """
+
+    code = "import resource\n" + "".join("import %s\n" % module
+                                         for module in modules) + \
+        "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+    env = dict(os.environ, PYTHONPATH=package_path)
+
+    best = float("inf")
+    memory = 0
+    for run in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", code], env=env,
+                                check=True, stdout=subprocess.PIPE).stdout
+        best = min(best, time.perf_counter() - start)
+        memory = int(output)
+    return best, memory
+
+
+if __name__ == "__main__":
+    installed = [name for name in former_dependencies if is_installed(name)]
+    missing = sorted(set(former_dependencies) - set(installed))
+    if missing:
+        print("not installed, left out: %s" % ", ".join(missing))
+
+    interpreter, _ = time_import([], bench_args.runs)
+    cases = [("IMAPCore", ["IMAPCore"]),
+             ("IMAPSync", ["IMAPSync"]),
+             ("IMAPCore + former dependencies", installed + ["IMAPCore"])]
+    if not missing:
+        cases.append(("IMAPBrowser", ["IMAPBrowser"]))
+
+    for name, modules in cases:
+        elapsed, memory = time_import(modules, bench_args.runs)
+        print("%-32s %8.1f ms  %8.1f MB" %
+              (name, (elapsed - interpreter) * 1000, memory / 1024))
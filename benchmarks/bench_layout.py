@@ -0,0 +1,124 @@
+"""
+Compares the HyperbolicLayout of IMAPCore with the recursive layout it
+replaced, and times refocusing the laid out tree on one of its nodes.
+
+Random trees are laid out by both algorithms. For the small trees the
+positions of both are compared, the script exits with an error if they
+differ. The times of both algorithms are printed for every tree size, the
+recursive one is skipped for big trees, as it needs quadratic time.
+
+Usage: python benchmarks/bench_layout.py [--nodes N] [--seed SEED]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+bench_parser = argparse.ArgumentParser()
+bench_parser.add_argument("--nodes", type=int, default=200000)
+bench_parser.add_argument("--seed", type=int, default=1)
+bench_args = bench_parser.parse_args()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import IMAPCore  # noqa: E402
+import numpy as np  # noqa: E402
+
+# the parameters of the layout used by IMAPBrowser for a root node with five
+# children
+root_angle = 2 * np.pi / 5
+rs = [.3, .5, .4, .5, .3, .3, .3]
+phi_0s = [2 * np.pi, root_angle / 2, root_angle / 3, root_angle / 4,
+          root_angle / 5, root_angle / 6, root_angle / 7]
+
+# the recursive layout only works on trees of a few thousand nodes
+max_recursive_nodes = 2000
+
+
+def make_tree(nodes, rng):
+    """
+    Creates a random tree of the given number of nodes and at most 6 levels
+    """
+
+    root = IMAPCore.Node(name="Root")
+    parents = [root]
+    for i in range(nodes - 1):
+        parent = rng.choice(parents)
+        child = IMAPCore.Node(parent, parent.depth + 1, str(i))
+        if child.depth < 6:
+            parents.append(child)
+    return root
+
+
+def recursive_layout(root):
+    """
+    The recursive layout of H2Tree.hyperbolize before it was replaced
+    """
+
+    position_dict = {root.number: (0, 0)}
+    moebius = IMAPCore.HyperbolicLayout.moebius
+
+    def focus_node(node):
+        c = complex(*position_dict[node.number])
+        phi = 0
+        if node.parent:
+            pos_parent = moebius(
+                complex(*position_dict[node.parent.number]), c)
+            phi = -np.arctan2(-pos_parent.imag, -pos_parent.real)
+        pos = moebius(np.array([complex(*p) for p in
+                                position_dict.values()]), c, phi)
+        return {key: (pos[i].real, pos[i].imag) for i, key in
+                enumerate(position_dict)}
+
+    def hyperbolize(node):
+        nonlocal position_dict
+        position_dict = focus_node(node)
+        pos_children = rs[node.depth] * np.exp(1j * np.linspace(
+            0, phi_0s[node.depth], len(node.children)))
+        for i, child in enumerate(node.children):
+            position_dict[child.number] = (pos_children[i].real,
+                                           pos_children[i].imag)
+        for child in node.children:
+            hyperbolize(child)
+
+    hyperbolize(root)
+    position_dict = focus_node(root)
+    return np.array([complex(*position_dict[number])
+                     for number in range(1, len(position_dict) + 1)])
+
+
+if __name__ == "__main__":
+    rng = random.Random(bench_args.seed)
+    sys.setrecursionlimit(10000)
+    layout = IMAPCore.HyperbolicLayout(rs, phi_0s)
+
+    sizes = sorted({10, 100, 1000, max_recursive_nodes, bench_args.nodes})
+    for nodes in sizes:
+        root = make_tree(nodes, rng)
+
+        start = time.perf_counter()
+        positions = layout.compute(root.tree, root.index)
+        array_time = time.perf_counter() - start
+
+        if nodes <= max_recursive_nodes:
+            start = time.perf_counter()
+            expected = recursive_layout(root)
+            recursive_time = time.perf_counter() - start
+
+            error = np.abs(positions - expected).max()
+            print("%7d nodes  array %8.4f s  recursive %8.4f s  "
+                  "max. difference %.1e" %
+                  (nodes, array_time, recursive_time, error))
+            if error > 1e-9:
+                sys.exit("The layouts differ for a tree of %d nodes." % nodes)
+        else:
+            print("%7d nodes  array %8.4f s" % (nodes, array_time))
+
+    # refocus the biggest tree on a node of its last level, as a click would
+    node = len(positions) - 1
+    start = time.perf_counter()
+    IMAPCore.HyperbolicLayout.focus_point(positions, positions[node])
+    refocus_time = time.perf_counter() - start
+    print("refocusing %d nodes  %.2f ms" %
+          (len(positions), refocus_time * 1000))
@@ -0,0 +1,264 @@
+"""
+Tests the asyncio backend of IMAPCore against a stand-in IMAP server running
+in the background: literals in the responses, tagged NO and BAD responses, and
+a worker reconnecting after its connection broke.
+
+Usage: python -m unittest discover tests
+"""
+
+import asyncio
+import imaplib
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import IMAPCore  # noqa: E402
+
+
+def make_header(uid):
+    # The subject ends like the first line of a literal, it must not be read
+    # as one.
+    return (b"Subject: mail %d {12}\r\nFrom: sender%d@example.org\r\n"
+            b"To: receiver@example.org\r\n"
+            b"Date: Sun, 01 Jan 2018 22:14:19 +0100\r\n\r\n" % (uid, uid))
+
+
+class StandInServer:
+    """
+    IMAP server with a directory INBOX holding three mails, the user 'user'
+    logs in with the password 'password'
+    """
+
+    structure = b'("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "7BIT" 12 1 ' \
+                b'NIL NIL NIL NIL)'
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+
+        # the number of connections opened so far
+        self.connections = 0
+
+        # the number of SELECT commands to be answered by closing the
+        # connection
+        self.drop_select = 0
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self.handle, "127.0.0.1", 0))
+            self.port = self.server.sockets[0].getsockname()[1]
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        ready.wait()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    async def handle(self, reader, writer):
+        self.connections = self.connections + 1
+        writer.write(b"* OK stand-in server ready\r\n")
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            tag, command, args = (line.rstrip(b"\r\n").split(b" ", 2) +
+                                  [b""])[:3]
+            command = command.upper()
+
+            if command == b"SELECT" and self.drop_select:
+                self.drop_select = self.drop_select - 1
+                break
+
+            writer.write(self.respond(tag, command, args))
+            await writer.drain()
+            if command == b"LOGOUT":
+                break
+        writer.close()
+
+    def respond(self, tag, command, args):
+        """
+        Gets the response to a command, an empty one for the command HANG,
+        which is never answered
+        """
+
+        if command == b"LOGIN":
+            if args == b'"user" "password"':
+                return tag + b" OK LOGIN completed\r\n"
+            return tag + b" NO [AUTHENTICATIONFAILED] Invalid credentials\r\n"
+
+        if command == b"SELECT":
+            if args != b'"INBOX"':
+                return tag + b" NO Mailbox does not exist\r\n"
+            return b"* 3 EXISTS\r\n* OK [UIDVALIDITY 7] UIDs valid\r\n" \
+                   b"* OK [UIDNEXT 4] Predicted next UID\r\n" + tag + \
+                   b" OK [READ-WRITE] SELECT completed\r\n"
+
+        if command == b"UID" and args.upper().startswith(b"SEARCH"):
+            return b"* SEARCH 1 2 3\r\n" + tag + b" OK SEARCH completed\r\n"
+
+        if command == b"UID" and args.upper().startswith(b"FETCH"):
+            response = []
+            for uid in args.split(b" ")[1].split(b","):
+                if int(uid) > 3:
+                    continue
+                header = make_header(int(uid))
+                response.append(
+                    b"* %s FETCH (UID %s RFC822.SIZE %d INTERNALDATE "
+                    b'"01-Jan-2018 22:14:19 +0100" BODY[HEADER.FIELDS '
+                    b"(SUBJECT FROM TO DATE)] {%d}\r\n%s BODYSTRUCTURE %s)\r\n"
+                    % (uid, uid, len(header) + 14, len(header), header,
+                       self.structure))
+            return b"".join(response) + tag + b" OK FETCH completed\r\n"
+
+        if command == b"LOGOUT":
+            return b"* BYE logging out\r\n" + tag + b" OK LOGOUT completed\r\n"
+
+        if command == b"HANG":
+            return b""
+
+        return tag + b" BAD Unknown command\r\n"
+
+
+class AsyncBackendTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandInServer()
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def connect(self):
+        svr = IMAPCore.AsyncImapConnection("127.0.0.1", self.server.port,
+                                           None)
+        svr.login("user", "password")
+        return svr
+
+    def get_parser(self, svr, connect=None):
+        return IMAPCore.ImapParse(svr, IMAPCore.Node(name="Root"), 1,
+                                  IMAPCore.columns, os.devnull, [], {}, [],
+                                  connect)
+
+    def test_select(self):
+        svr = self.connect()
+        typ, dat = svr.select('"INBOX"')
+        self.assertEqual(typ, "OK")
+        self.assertEqual(dat, [b"3"])
+        self.assertEqual(svr.response("UIDVALIDITY"), ("UIDVALIDITY", [b"7"]))
+        self.assertEqual(svr.response("UIDNEXT"), ("UIDNEXT", [b"4"]))
+        svr.logout()
+
+    def test_literals(self):
+        svr = self.connect()
+        svr.select('"INBOX"')
+        parser = self.get_parser(svr)
+
+        mails = list(parser.download_mails(svr, [b"1", b"2", b"3"]))
+        self.assertEqual([mail["UID"] for mail in mails], [b"1", b"2", b"3"])
+        self.assertEqual(mails[1]["Subject"], "mail 2 {12}")
+        self.assertEqual(mails[1]["From"], "sender2@example.org")
+        self.assertEqual(mails[1]["Date"], "Sun, 01 Jan 2018 22:14:19 +0100")
+        self.assertEqual(mails[1]["Internal_Date"],
+                         "01-Jan-2018 22:14:19 +0100")
+        svr.logout()
+
+    def test_pipeline(self):
+        svr = self.connect()
+        svr.select('"INBOX"')
+
+        typ, dat = svr.uid_pipeline("FETCH", ["1", "2,3"], "(UID)")
+        self.assertEqual(typ, "OK")
+        self.assertEqual(sorted(IMAPCore.FetchResponse.parse(dat)), [1, 2, 3])
+        svr.logout()
+
+    def test_tagged_no(self):
+        svr = IMAPCore.AsyncImapConnection("127.0.0.1", self.server.port,
+                                           None)
+        with self.assertRaises(imaplib.IMAP4.error):
+            svr.login("user", "wrong")
+
+        svr.login("user", "password")
+        typ, dat = svr.select('"Missing"')
+        self.assertEqual(typ, "NO")
+        self.assertEqual(dat, [b"Mailbox does not exist"])
+
+        # the connection can still be used
+        self.assertEqual(svr.select('"INBOX"')[0], "OK")
+        svr.logout()
+
+    def test_tagged_bad(self):
+        svr = self.connect()
+        with self.assertRaises(imaplib.IMAP4.error):
+            svr.simple_command("UNKNOWN")
+
+        self.assertEqual(svr.select('"INBOX"')[0], "OK")
+        svr.logout()
+
+    def test_connection_closed_by_server(self):
+        svr = self.connect()
+        self.server.drop_select = 1
+        with self.assertRaises(imaplib.IMAP4.abort):
+            svr.select('"INBOX"')
+
+    def test_shutdown_fails_waiting_command(self):
+        svr = self.connect()
+        errors = []
+
+        def hang():
+            try:
+                svr.simple_command("HANG")
+            except Exception as ex:
+                errors.append(ex)
+
+        thread = threading.Thread(target=hang)
+        thread.start()
+        thread.join(0.2)
+        svr.shutdown()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertIsInstance(errors[0], imaplib.IMAP4.abort)
+
+    def test_worker_reconnects(self):
+        svr = self.connect()
+        parser = self.get_parser(svr, self.connect)
+        parser.workers = 2
+        parser.start_workers()
+        try:
+            directory = IMAPCore.Node(parser.root, 1, "INBOX")
+
+            # the first download fails, its connection is dropped
+            self.server.drop_select = 1
+            items = list(parser.submit_directory(directory))
+            self.assertEqual(items[-1], ("done", ([b""], False)))
+            self.assertEqual(parser.connections, [])
+
+            # the next one opens a new connection
+            connections = self.server.connections
+            items = list(parser.submit_directory(directory))
+            self.assertEqual(items[-1], ("done", ([b"1 2 3"], True)))
+            self.assertEqual([len(value[0]) for item, value in items
+                              if item == "mails"], [3])
+            self.assertEqual(self.server.connections, connections + 1)
+        finally:
+            parser.stop_workers()
+        svr.logout()
+
+
+if __name__ == "__main__":
+    unittest.main()